@@ -3,6 +3,8 @@ from pathlib import Path
 from datetime import timedelta
 from dotenv import load_dotenv
 import os
+import sys
+import tempfile
 import pymysql
 
 pymysql.install_as_MySQLdb()
@@ -33,6 +35,7 @@ INSTALLED_APPS = [
     'timesheet_app',
     'corsheaders',
     'rest_framework_simplejwt',
+    'rest_framework_simplejwt.token_blacklist',
     'whitenoise.runserver_nostatic',  
 ]
 
@@ -46,6 +49,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'timesheet_app.middleware.ReissueAccessTokenMiddleware',
 ]
 CORS_ALLOW_CREDENTIALS = True  
 CORS_ALLOWED_ORIGINS = [
@@ -53,6 +57,8 @@ CORS_ALLOWED_ORIGINS = [
     "https://web-production-11c4.up.railway.app",
     "https://timesheet-app-backend-ds6w.onrender.com",
 ]
+# Lets browser clients read tokens re-issued by ReissueAccessTokenMiddleware
+CORS_EXPOSE_HEADERS = ["X-Access-Token"]
 CSRF_TRUSTED_ORIGINS = [
     "https://timesheet-vite-frontend.vercel.app",  
     "https://web-production-11c4.up.railway.app",
@@ -105,6 +111,51 @@ DATABASES = {
 # }
 
 
+# Cache
+# Shared by every worker process: password reset codes, token role-change
+# stamps and the cached API responses all live here.
+# CACHE_BACKEND selects "file" (default), "database" (run `manage.py createcachetable`)
+# or "redis" (default when REDIS_URL is set).
+
+REDIS_URL = os.getenv("REDIS_URL")
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "redis" if REDIS_URL else "file")
+# The file and database backends cull a third of their entries past this
+# (Django's default is 300); cached dashboards and reference data are kept
+# per project, scope and date range, so leave room for them
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 20000))
+
+if len(sys.argv) > 1 and sys.argv[1] == 'test':
+    # Local stand-in so tests never share state with a running server
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+elif CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL or 'redis://127.0.0.1:6379/0',
+        }
+    }
+elif CACHE_BACKEND == 'database':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'timesheet_cache',
+            'OPTIONS': {'MAX_ENTRIES': CACHE_MAX_ENTRIES},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv("CACHE_LOCATION", os.path.join(tempfile.gettempdir(), 'timesheet_app_cache')),
+            'OPTIONS': {'MAX_ENTRIES': CACHE_MAX_ENTRIES},
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -150,15 +201,20 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REST_FRAMEWORK = {
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'timesheet_app.authentication.CachedJWTAuthentication',
         'timesheet_app.authentication.CookieJWTAuthentication',
     ],
 }
+# Per-process authentication fast path (see timesheet_app/authentication.py)
+AUTH_TOKEN_CACHE_SIZE = 1024  # validated tokens kept per worker
+AUTH_USER_CACHE_TTL = 60  # seconds a user row is reused without a SELECT
 SIMPLE_JWT = {
-    'ACCESS_TOKEN_LIFETIME': timedelta(days=2),  
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=15),  # renewed via /api/token/refresh/
     'REFRESH_TOKEN_LIFETIME': timedelta(days=6), 
-    'ROTATE_REFRESH_TOKENS': False,  
-    'BLACKLIST_AFTER_ROTATION': False,  
+    'ROTATE_REFRESH_TOKENS': True,  
+    # A rotated or logged-out refresh token is blacklisted; prune expired rows
+    # with `manage.py flushexpiredtokens`
+    'BLACKLIST_AFTER_ROTATION': True,  
     'UPDATE_LAST_LOGIN': False, 
 }
 
@@ -1,12 +1,16 @@
 from django.contrib import admin
-from .models import CustomUser, Admin, TeamLeader, User, Team, Project, Task, Timesheet, TimesheetTable
+from .models import CustomUser, Admin, TeamLeader, User, Team, TeamRole, Project, Task, Timesheet, TimesheetTable, ProjectMembership, ReminderLog, DeletionJob
 
 admin.site.register(CustomUser)
 admin.site.register(Admin)
 admin.site.register(TeamLeader)
 admin.site.register(User)
 admin.site.register(Team)
+admin.site.register(TeamRole)
 admin.site.register(Project)
 admin.site.register(Task)
 admin.site.register(Timesheet)
 admin.site.register(TimesheetTable)
+admin.site.register(ProjectMembership)
+admin.site.register(ReminderLog)
+admin.site.register(DeletionJob)
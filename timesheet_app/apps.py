@@ -3,3 +3,8 @@ from django.apps import AppConfig
 class TimesheetAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'timesheet_app'
+
+    def ready(self):
+        # Connect the auth cache, project membership, membership graph, dashboard
+        # and reference data receivers
+        from timesheet_app import authentication, dashboards, membership_graph, memberships, reference_data  # noqa: F401
@@ -1,10 +1,151 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework.exceptions import AuthenticationFailed
 
+from timesheet_app.cache import shared_cache
+from timesheet_app.models import CustomUser
+from timesheet_app.tokens import has_role_claims
+
+
+# Per-process cache of validated tokens, keyed by the SHA-256 of the raw token.
+# Entries never outlive the token's own `exp` claim.
+class ValidatedTokenCache:
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            token, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return token
+
+    def set(self, key, token, expires_at):
+        with self._lock:
+            self._entries[key] = (token, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Per-process cache of user rows keyed by user id, dropped on every write to the user
+class UserCache:
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            user, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[user_id]
+                return None
+        # Hand out a copy so per-request mutations never leak into the cache
+        return copy.copy(user)
+
+    def set(self, user_id, user):
+        with self._lock:
+            self._entries[user_id] = (copy.copy(user), time.time() + self.ttl)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = ValidatedTokenCache(getattr(settings, "AUTH_TOKEN_CACHE_SIZE", 1024))
+user_cache = UserCache(getattr(settings, "AUTH_USER_CACHE_TTL", 60))
+
+
+def role_changed_key(user_id):
+    return f"role_changed_{user_id}"
+
+
+def role_changed_since(user_id, issued_at):
+    changed_at = shared_cache.get(role_changed_key(user_id))
+    return changed_at is not None and changed_at >= issued_at
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that skips signature validation and the user SELECT
+    for tokens and users seen recently by this process. Tokens carrying role
+    claims authenticate without a user row at all until the role changes.
+    """
+
+    reissue_for = None
+    # How the re-issued token reaches the client (see ReissueAccessTokenMiddleware)
+    reissue_via = "header"
 
-class CookieJWTAuthentication(JWTAuthentication):
     def authenticate(self, request):
-        access_token = request.COOKIES.get("access_token")  
+        result = super().authenticate(request)
+        self.flag_reissue(request)
+        return result
+
+    def flag_reissue(self, request):
+        if self.reissue_for is not None:
+            request._request.reissue_access_token_for = self.reissue_for
+            request._request.reissue_access_token_via = self.reissue_via
+
+    def get_validated_token(self, raw_token):
+        if isinstance(raw_token, str):
+            raw_token = raw_token.encode()
+        key = hashlib.sha256(raw_token).hexdigest()
+
+        validated_token = token_cache.get(key)
+        if validated_token is None:
+            validated_token = super().get_validated_token(raw_token)
+            token_cache.set(key, validated_token, validated_token.get("exp", 0))
+        return validated_token
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is not None and has_role_claims(validated_token):
+            if not role_changed_since(user_id, validated_token.get("iat", 0)):
+                return CustomUser.from_token_claims(validated_token)
+            # Claims are stale: authenticate against the current row and re-issue
+            self.reissue_for = JWTAuthentication.get_user(self, validated_token)
+            return self.reissue_for
+
+        user = user_cache.get(user_id) if user_id is not None else None
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, user)
+        return user
+
+
+class CookieJWTAuthentication(CachedJWTAuthentication):
+    reissue_via = "cookie"
+
+    def authenticate(self, request):
+        access_token = request.COOKIES.get("access_token")
 
         if not access_token:
             return None
@@ -12,8 +153,26 @@ class CookieJWTAuthentication(JWTAuthentication):
         try:
             validated_token = self.get_validated_token(access_token)
             user = self.get_user(validated_token)
+            self.flag_reissue(request)
             return user, validated_token
         except AuthenticationFailed as e:
             return None
         except Exception as e:
             return None
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_cached_user(sender, instance, **kwargs):
+    user_cache.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def record_role_change(sender, instance, created=False, **kwargs):
+    if created:
+        return
+    if kwargs["signal"] is post_delete or instance.role_changed():
+        # Tokens issued up to now carry stale claims for this user
+        lifetime = settings.SIMPLE_JWT["ACCESS_TOKEN_LIFETIME"].total_seconds()
+        shared_cache.set(role_changed_key(instance.pk), int(time.time()), timeout=int(lifetime))
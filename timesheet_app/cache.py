@@ -0,0 +1,39 @@
+import time
+
+from django.core.cache import cache
+
+# Every cross-worker caching feature goes through this module so the backend
+# configured in settings.CACHES is the single source of shared state.
+shared_cache = cache
+
+
+def version_key(name):
+    return f"version_{name}"
+
+
+def new_counter_value():
+    # Counters can be culled like any other entry. A missing one restarts from
+    # the clock rather than from 1, so it never repeats a value still keying
+    # cached entries.
+    return time.time_ns()
+
+
+def get_version(name):
+    """Current value of a named data-version counter."""
+    key = version_key(name)
+    version = shared_cache.get(key)
+    if version is None:
+        shared_cache.add(key, new_counter_value(), timeout=None)
+        version = shared_cache.get(key)
+    return version
+
+
+def bump_version(name):
+    """Invalidate everything cached under the previous value of the counter."""
+    key = version_key(name)
+    try:
+        return shared_cache.incr(key)
+    except ValueError:
+        # Counter missing or evicted: a fresh clock value is new to every entry
+        shared_cache.add(key, new_counter_value(), timeout=None)
+        return shared_cache.get(key)
@@ -0,0 +1,166 @@
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from timesheet_app.cache import bump_version, get_version, shared_cache
+from timesheet_app.models import Timesheet
+
+# Cached dashboards are versioned per project and dropped when a timesheet of
+# that project is written. The timeout bounds staleness from changes that do
+# not touch timesheets, such as a user moving to another team or subteam.
+DASHBOARD_CACHE_TIMEOUT = 600
+
+
+def dashboard_version_name(project_id):
+    return f"project_timesheets_{project_id}"
+
+
+def _sorted_totals(totals, key):
+    return [
+        {key: name, "hours": float(hours)}
+        for name, hours in sorted(totals.items(), key=lambda item: item[1], reverse=True)
+    ]
+
+
+def _hours_rollup(rows, user_fields=()):
+    """
+    Total, per-day (with the running total) and per-user hours of rows
+    grouped by date and created_by, in date order. Each user also carries
+    the created_by__<field> values of `user_fields`.
+    """
+    by_day = defaultdict(Decimal)
+    by_user = {}
+    for row in rows:
+        hours = row['hours'] or Decimal(0)
+        by_day[row['date']] += hours
+        user = by_user.setdefault(row['created_by_id'], {
+            "id": row['created_by_id'],
+            "username": row['created_by__username'],
+            **{field: row[f'created_by__{field}'] for field in user_fields},
+            "hours": Decimal(0),
+        })
+        user["hours"] += hours
+
+    days = []
+    cumulative = Decimal(0)
+    for date, hours in by_day.items():
+        cumulative += hours
+        days.append({"date": date, "hours": float(hours), "cumulative_hours": float(cumulative)})
+
+    users = sorted(by_user.values(), key=lambda user: user["hours"], reverse=True)
+    for user in users:
+        user["hours"] = float(user["hours"])
+
+    return {"total_hours": float(cumulative), "days": days, "users": users}
+
+
+def build_project_dashboard(project_id, start, end):
+    """
+    Hours per day, team, subteam and user for one project and date range,
+    rolled up from a single grouped query over the (project, date) index.
+    """
+    rows = list(
+        Timesheet.objects.visible().filter(project_id=project_id, date__range=(start, end))
+        .values('date', 'created_by_id', 'created_by__username', 'created_by__team', 'created_by__subteam')
+        .annotate(hours=Sum('hours'))
+        .order_by('date')
+    )
+
+    by_team = defaultdict(Decimal)
+    by_subteam = defaultdict(Decimal)
+    for row in rows:
+        hours = row['hours'] or Decimal(0)
+        by_team[row['created_by__team'] or "Uncategorized"] += hours
+        by_subteam[row['created_by__subteam'] or "Uncategorized"] += hours
+
+    rollup = _hours_rollup(rows, user_fields=('team', 'subteam'))
+    return {
+        "total_hours": rollup["total_hours"],
+        "days": rollup["days"],
+        "teams": _sorted_totals(by_team, "team"),
+        "subteams": _sorted_totals(by_subteam, "subteam"),
+        "users": rollup["users"],
+    }
+
+
+def build_task_hours(task_id):
+    """
+    Hours logged against one task per day, with the running total, and per
+    user, from a single grouped query over the (linked_task, date) index.
+    """
+    rows = (
+        Timesheet.objects.visible().filter(linked_task_id=task_id)
+        .values('date', 'created_by_id', 'created_by__username')
+        .annotate(hours=Sum('hours'))
+        .order_by('date')
+    )
+
+    return _hours_rollup(rows)
+
+
+def get_project_dashboard(project_id, start, end):
+    version = get_version(dashboard_version_name(project_id))
+    key = f"project_dashboard_{project_id}_{version}_{start.isoformat()}_{end.isoformat()}"
+    dashboard = shared_cache.get(key)
+    if dashboard is None:
+        dashboard = build_project_dashboard(project_id, start, end)
+        shared_cache.set(key, dashboard, timeout=DASHBOARD_CACHE_TIMEOUT)
+    return dashboard
+
+
+def project_schedule(project, today=None):
+    """The planned start_date..deadline span and how much of it has elapsed."""
+    today = today or datetime.date.today()
+    planned_days = max((project.deadline - project.start_date).days + 1, 1)
+    elapsed_days = min(max((today - project.start_date).days + 1, 0), planned_days)
+    return {
+        "start_date": project.start_date,
+        "deadline": project.deadline,
+        "planned_days": planned_days,
+        "elapsed_days": elapsed_days,
+        "elapsed_percent": round(100 * elapsed_days / planned_days, 1),
+        "overdue_days": max((today - project.deadline).days, 0),
+    }
+
+
+class _PendingDashboardBumps(set):
+    """Project ids whose dashboard version is bumped when the transaction commits."""
+
+    done = False
+
+    def __call__(self):
+        self.done = True
+        for project_id in self:
+            bump_version(dashboard_version_name(project_id))
+
+
+def invalidate_project_dashboards(project_ids):
+    """
+    Bump the dashboard version of each project after commit, so no request
+    caches totals another transaction is still writing under the new
+    version. A transaction bumps each project once, however many of its
+    timesheets it writes.
+    """
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        _PendingDashboardBumps(project_ids)()
+        return
+    pending = getattr(connection, '_pending_dashboard_bumps', None)
+    # Not queued yet in this transaction, or dropped by a savepoint rollback
+    if pending is None or pending.done or not any(callback[1] is pending for callback in connection.run_on_commit):
+        pending = connection._pending_dashboard_bumps = _PendingDashboardBumps()
+        transaction.on_commit(pending)
+    pending.update(project_ids)
+
+
+@receiver(post_save, sender=Timesheet)
+@receiver(post_delete, sender=Timesheet)
+def invalidate_project_dashboard(sender, instance, **kwargs):
+    project_ids = {instance.project_id, getattr(instance, '_loaded_project_id', None)}
+    invalidate_project_dashboards(project_ids - {None})
+    instance._loaded_project_id = instance.project_id
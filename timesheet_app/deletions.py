@@ -0,0 +1,132 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+
+from timesheet_app.models import DeletionJob, Project, ProjectMembership, Task, Team, TeamRole, Timesheet, TimesheetTable
+
+logger = logging.getLogger(__name__)
+
+# Rows deleted per transaction, so no single chunk holds the write lock for long
+DELETION_CHUNK_SIZE = getattr(settings, "DELETION_CHUNK_SIZE", 500)
+
+
+# Each plan lists the querysets to empty, in order; the object itself goes last
+# once nothing large is left to cascade from it
+def project_deletion_steps(project_id):
+    return [
+        Timesheet.objects.filter(project_id=project_id),
+        Task.objects.filter(project_id=project_id),
+        ProjectMembership.objects.filter(project_id=project_id),
+        Team.projects.through.objects.filter(project_id=project_id),
+        Project.all_objects.filter(pk=project_id),
+    ]
+
+
+def team_deletion_steps(team_id):
+    return [
+        Team.members.through.objects.filter(team_id=team_id),
+        Team.account_managers.through.objects.filter(team_id=team_id),
+        Team.projects.through.objects.filter(team_id=team_id),
+        TeamRole.objects.filter(team_id=team_id),
+        Team.all_objects.filter(pk=team_id),
+    ]
+
+
+def timesheet_table_deletion_steps(table_id):
+    table_timesheets = TimesheetTable.timesheets.through.objects
+    in_other_tables = table_timesheets.filter(timesheet_id=OuterRef('pk')).exclude(timesheettable_id=table_id)
+    return [
+        # As in TimesheetTable.delete(): timesheets no other table holds go too
+        Timesheet.objects.filter(timesheet_tables__id=table_id).filter(~Exists(in_other_tables)),
+        table_timesheets.filter(timesheettable_id=table_id),
+        TimesheetTable.all_objects.filter(pk=table_id),
+    ]
+
+
+DELETION_PLANS = {
+    'Project': project_deletion_steps,
+    'Team': team_deletion_steps,
+    'TimesheetTable': timesheet_table_deletion_steps,
+}
+
+
+def delete_in_chunks(job, rows):
+    model = rows.model
+    while True:
+        with transaction.atomic():
+            ids = list(rows.values_list('pk', flat=True)[:DELETION_CHUNK_SIZE])
+            if not ids:
+                return
+            model._base_manager.filter(pk__in=ids).delete()
+            DeletionJob.objects.filter(pk=job.pk).update(
+                deleted_rows=F('deleted_rows') + len(ids), updated_at=timezone.now()
+            )
+
+
+def run_deletion_job(job_id):
+    """Run a deletion job to completion in this thread, resuming from its saved step."""
+    job = DeletionJob.objects.get(pk=job_id)
+    if job.status == DeletionJob.COMPLETED:
+        return job
+
+    steps = DELETION_PLANS[job.model](job.object_id)
+    try:
+        if job.step == 0 and not job.total_rows:
+            job.total_rows = sum(rows.count() for rows in steps)
+        job.status = DeletionJob.RUNNING
+        job.error = ''
+        job.save(update_fields=['status', 'error', 'total_rows', 'updated_at'])
+
+        for index in range(job.step, len(steps)):
+            delete_in_chunks(job, steps[index])
+            job.step = index + 1
+            job.save(update_fields=['step', 'updated_at'])
+    except Exception as e:
+        logger.exception(f"Deletion job {job.pk} failed at step {job.step}")
+        job.status = DeletionJob.FAILED
+        job.error = str(e)
+    else:
+        job.status = DeletionJob.COMPLETED
+        job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished_at', 'updated_at'])
+    # deleted_rows is only ever incremented in the database
+    job.refresh_from_db(fields=['deleted_rows'])
+    return job
+
+
+# One worker per process: jobs run one after another, never as parallel writers
+_deletion_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="deletion")
+
+def _run_deletion_job_in_thread(job_id):
+    try:
+        run_deletion_job(job_id)
+    except Exception as e:
+        logger.error(f"Deletion job {job_id} could not run: {str(e)}")
+    finally:
+        connection.close()
+
+def queue_deletion_job(job_id):
+    _deletion_executor.submit(_run_deletion_job_in_thread, job_id)
+
+
+def schedule_deletion(instance, requested_by=None):
+    """
+    Hide `instance` at once and queue the background job that deletes it and
+    everything cascading from it. Returns the DeletionJob.
+    """
+    with transaction.atomic():
+        instance.is_hidden = True
+        # save() rather than update() so membership receivers see the change
+        instance.save(update_fields=['is_hidden'])
+        job = DeletionJob.objects.create(
+            model=type(instance).__name__,
+            object_id=instance.pk,
+            object_repr=str(instance)[:255],
+            requested_by=requested_by,
+        )
+        transaction.on_commit(lambda: queue_deletion_job(job.pk))
+    return job
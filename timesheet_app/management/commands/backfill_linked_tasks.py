@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from timesheet_app.task_links import BACKFILL_CHUNK_SIZE, backfill_linked_tasks
+
+
+class Command(BaseCommand):
+    help = "Link timesheets to the task their text names within the same project."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=BACKFILL_CHUNK_SIZE,
+                            help="Timesheets per transaction (default: %(default)s)")
+        parser.add_argument("--relink", action="store_true",
+                            help="Match already linked timesheets again too")
+
+    def handle(self, *args, **options):
+        scanned, linked = backfill_linked_tasks(options["chunk_size"], options["relink"])
+        self.stdout.write(self.style.SUCCESS(
+            f"{scanned} timesheets scanned, {linked} linked to a task"
+        ))
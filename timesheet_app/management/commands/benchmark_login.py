@@ -0,0 +1,76 @@
+import logging
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+from django.urls import reverse
+
+from timesheet_app.models import CustomUser
+
+
+# The status each kind of attempt must get, so a broken login path is
+# reported as an error rather than timed as throughput
+EXPECTED_STATUS = {"valid": 200, "wrong_password": 401, "unknown_user": 404}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure login throughput under a mix of valid logins, wrong passwords "
+        "and unknown usernames. Benchmark users are created inside a transaction "
+        "that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--attempts", type=int, default=200)
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--invalid-ratio", type=float, default=0.5,
+                            help="Share of attempts with a wrong password or unknown username")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        # Failed logins would otherwise log one warning each
+        logging.getLogger("django.request").setLevel(logging.ERROR)
+        password = "benchmark-password"
+
+        with transaction.atomic():
+            usernames = []
+            for i in range(options["users"]):
+                user = CustomUser.objects.create_user(
+                    f"bench_login_{i}", password,
+                    usertype="User", email=f"bench_login_{i}@example.com",
+                )
+                usernames.append(user.username)
+
+            client = Client()
+            url = reverse("token_obtain_pair")
+            timings = {"valid": [], "wrong_password": [], "unknown_user": []}
+
+            for _ in range(options["attempts"]):
+                if rng.random() >= options["invalid_ratio"]:
+                    kind, payload = "valid", {"username": rng.choice(usernames), "password": password}
+                elif rng.random() < 0.5:
+                    kind, payload = "wrong_password", {"username": rng.choice(usernames), "password": "wrong"}
+                else:
+                    kind, payload = "unknown_user", {"username": f"nobody_{rng.random()}", "password": "wrong"}
+
+                started = time.perf_counter()
+                response = client.post(url, payload, content_type="application/json")
+                timings[kind].append(time.perf_counter() - started)
+                if response.status_code != EXPECTED_STATUS[kind]:
+                    raise CommandError(
+                        f"{kind} login returned {response.status_code}, "
+                        f"expected {EXPECTED_STATUS[kind]}: {response.content[:200]!r}"
+                    )
+
+            transaction.set_rollback(True)
+
+        total = sum(sum(values) for values in timings.values())
+        self.stdout.write(f"{options['attempts']} attempts in {total:.2f}s "
+                          f"({options['attempts'] / total:.1f} logins/s)")
+        for kind, values in timings.items():
+            if values:
+                average = sum(values) / len(values) * 1000
+                self.stdout.write(f"  {kind:<15} {len(values):>5} attempts, {average:.1f} ms avg")
@@ -0,0 +1,36 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from timesheet_app.user_import import import_users, parse_user_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-create users from a CSV or JSON file (same fields as /api/register/). "
+        "Use this for imports larger than /api/users/import/ accepts (IMPORT_REQUEST_MAX_ROWS)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=["csv", "json"],
+                            help="Defaults to the file extension")
+        parser.add_argument("--no-notify", action="store_true",
+                            help="Do not queue Telegram welcome messages")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or os.path.splitext(path)[1].lstrip(".").lower()
+        try:
+            with open(path, "rb") as f:
+                rows = parse_user_rows(f.read(), file_format)
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        result = import_users(rows, notify=not options["no_notify"])
+
+        for error in result["errors"]:
+            self.stderr.write(f"Row {error['row']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {len(result['created'])} users, skipped {len(result['errors'])} rows"
+        ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from timesheet_app.memberships import rebuild_project_memberships
+from timesheet_app.models import ProjectMembership
+
+
+class Command(BaseCommand):
+    help = "Recompute the ProjectMembership index from projects and their teams."
+
+    def add_arguments(self, parser):
+        parser.add_argument("project_ids", nargs="*", type=int,
+                            help="Only rebuild these projects (default: all)")
+
+    def handle(self, *args, **options):
+        rebuild_project_memberships(options["project_ids"] or None)
+        self.stdout.write(self.style.SUCCESS(
+            f"{ProjectMembership.objects.count()} project memberships indexed"
+        ))
@@ -0,0 +1,30 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from timesheet_app.models import ReminderLog
+from timesheet_app.reminders import missing_timesheet_reminders, previous_workdays, send_reminders
+
+
+class Command(BaseCommand):
+    help = "Send each user and team leader one digest of the workdays with no timesheet logged."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", type=date.fromisoformat,
+                            help="Check the workdays before this YYYY-MM-DD date (default: today)")
+        parser.add_argument("--days", type=int, default=1,
+                            help="Workdays to check (default: %(default)s)")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Count the reminders without sending or logging them")
+
+    def handle(self, *args, **options):
+        if options["days"] < 1:
+            raise CommandError("--days must be at least 1")
+        days = previous_workdays(options["date"] or timezone.localdate(), options["days"])
+        digests, reminders = send_reminders(
+            ReminderLog.MISSING_TIMESHEET, missing_timesheet_reminders(days), dry_run=options["dry_run"]
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{reminders} missing timesheet reminders in {digests} digests ({days[0]} to {days[-1]})"
+        ))
@@ -0,0 +1,26 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from timesheet_app.models import ReminderLog
+from timesheet_app.reminders import overdue_task_reminders, send_reminders
+
+
+class Command(BaseCommand):
+    help = "Send each assignee and task creator one digest of open tasks past their end date."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", type=date.fromisoformat,
+                            help="Treat this YYYY-MM-DD date as today (default: today)")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Count the reminders without sending or logging them")
+
+    def handle(self, *args, **options):
+        today = options["date"] or timezone.localdate()
+        digests, reminders = send_reminders(
+            ReminderLog.OVERDUE_TASK, overdue_task_reminders(today), dry_run=options["dry_run"]
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{reminders} overdue task reminders in {digests} digests"
+        ))
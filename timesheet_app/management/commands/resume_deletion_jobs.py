@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from timesheet_app.deletions import run_deletion_job
+from timesheet_app.models import DeletionJob
+
+
+class Command(BaseCommand):
+    help = (
+        "Run deletion jobs left unfinished (pending, interrupted or failed) to completion. "
+        "Runs on every release (see Procfile); schedule it too if workers restart between releases."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("job_ids", nargs="*", type=int,
+                            help="Only resume these jobs (default: every unfinished job)")
+
+    def handle(self, *args, **options):
+        jobs = DeletionJob.objects.exclude(status=DeletionJob.COMPLETED).order_by("id")
+        if options["job_ids"]:
+            jobs = jobs.filter(id__in=options["job_ids"])
+
+        for job_id in jobs.values_list("id", flat=True):
+            job = run_deletion_job(job_id)
+            if job.status == DeletionJob.COMPLETED:
+                self.stdout.write(self.style.SUCCESS(
+                    f"{job}: {job.deleted_rows} rows deleted"
+                ))
+            else:
+                self.stdout.write(self.style.ERROR(f"{job}: {job.error}"))
@@ -0,0 +1,176 @@
+import threading
+from collections import defaultdict, namedtuple
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from timesheet_app.cache import bump_version, get_version
+from timesheet_app.models import CustomUser, Project, ProjectMembership, Team, TeamRole
+
+# Every process keeps one copy of the graph and rebuilds it when this shared
+# counter moves, so a write in any worker invalidates all of them
+MEMBERSHIP_GRAPH_VERSION = "membership_graph"
+
+# find_users() default for filters that are not applied
+ANY = object()
+
+UserNode = namedtuple('UserNode', ('id', 'username', 'usertype', 'team', 'subteam'))
+
+
+class TeamNode:
+    __slots__ = ('id', 'leaders', 'account_managers', 'members', 'members_by_subteam', 'project_ids')
+
+    def __init__(self, id):
+        self.id = id
+        # {'Search': user_id, ...} for the disciplines that have a leader
+        self.leaders = {}
+        self.account_managers = set()
+        self.members = set()
+        self.members_by_subteam = defaultdict(list)
+        self.project_ids = set()
+
+
+class MembershipGraph:
+    """
+    Users, visible teams and the projects assigned to them, indexed in memory:
+    user -> teams and roles, team -> members by subteam, team -> projects.
+    Roles use the ProjectMembership names.
+    """
+
+    def __init__(self, version, users, teams, created_projects):
+        self.version = version
+        self.users = users
+        self.teams = teams
+        self.created_projects = created_projects
+        self.team_roles = defaultdict(dict)
+        for team in teams.values():
+            for user_id in team.account_managers:
+                self.team_roles[user_id].setdefault(team.id, set()).add(ProjectMembership.ACCOUNT_MANAGER)
+            for user_id in team.leaders.values():
+                self.team_roles[user_id].setdefault(team.id, set()).add(ProjectMembership.TEAM_LEADER)
+            for user_id in team.members:
+                self.team_roles[user_id].setdefault(team.id, set()).add(ProjectMembership.MEMBER)
+        self.by_usertype = defaultdict(list)
+        for user in users.values():
+            self.by_usertype[user.usertype].append(user)
+
+    @classmethod
+    def build(cls, version):
+        users = {
+            row[0]: UserNode(*row)
+            for row in CustomUser.objects.order_by('id').values_list('id', 'username', 'usertype', 'team', 'subteam')
+        }
+
+        teams = {team_id: TeamNode(team_id) for team_id in Team.objects.order_by('id').values_list('id', flat=True)}
+
+        leaders = TeamRole.objects.filter(role=TeamRole.TEAM_LEADER).values_list('team_id', 'discipline', 'user_id')
+        for team_id, discipline, user_id in leaders:
+            if team_id in teams:
+                teams[team_id].leaders[discipline] = user_id
+
+        for team_id, user_id in Team.account_managers.through.objects.values_list('team_id', 'customuser_id'):
+            if team_id in teams:
+                teams[team_id].account_managers.add(user_id)
+        for team_id, user_id in Team.members.through.objects.order_by('customuser_id').values_list('team_id', 'customuser_id'):
+            if team_id in teams:
+                teams[team_id].members.add(user_id)
+                teams[team_id].members_by_subteam[users[user_id].subteam].append(user_id)
+
+        # Hidden projects are awaiting their DeletionJob, as in memberships
+        for team_id, project_id in Team.projects.through.objects.filter(project__is_hidden=False).values_list('team_id', 'project_id'):
+            if team_id in teams:
+                teams[team_id].project_ids.add(project_id)
+
+        created_projects = defaultdict(set)
+        for project_id, created_by_id in Project.objects.values_list('id', 'created_by_id'):
+            created_projects[created_by_id].add(project_id)
+
+        return cls(version, users, teams, created_projects)
+
+    def team_ids(self, user_id, roles=None):
+        """Ids of the teams `user_id` holds any of `roles` in (any role when None)."""
+        return sorted(
+            team_id for team_id, held in self.team_roles.get(user_id, {}).items()
+            if roles is None or held.intersection(roles)
+        )
+
+    def led_teams(self, user_id):
+        """(team_id, discipline) for each team `user_id` leads, by team id."""
+        return [
+            (team_id, discipline)
+            for team_id in self.team_ids(user_id, [ProjectMembership.TEAM_LEADER])
+            for discipline in TeamRole.DISCIPLINES if self.teams[team_id].leaders.get(discipline) == user_id
+        ]
+
+    def project_ids(self, user_id, roles):
+        """Ids of the projects `user_id` holds any of `roles` in."""
+        project_ids = set()
+        if ProjectMembership.CREATOR in roles:
+            project_ids |= self.created_projects.get(user_id, set())
+        for team_id in self.team_ids(user_id, roles):
+            project_ids |= self.teams[team_id].project_ids
+        return project_ids
+
+    def find_users(self, usertypes=None, team=ANY, subteam=ANY, exclude_ids=(), exclude_usernames=()):
+        """Users of the given types (all when None), by id, narrowed like filter(team=, subteam=)."""
+        users = self.users.values() if usertypes is None else (
+            user for usertype in set(usertypes) for user in self.by_usertype.get(usertype, ())
+        )
+        return sorted((
+            user for user in users
+            if (team is ANY or user.team == team)
+            and (subteam is ANY or user.subteam == subteam)
+            and user.id not in exclude_ids
+            and user.username not in exclude_usernames
+        ), key=lambda user: user.id)
+
+
+_graph = None
+_graph_lock = threading.Lock()
+
+
+def get_membership_graph():
+    """This process's graph, rebuilt first if the shared version has moved on."""
+    global _graph
+    # Read before building, so a write that lands mid-build leaves the new
+    # graph already out of date rather than wrongly current
+    version = get_version(MEMBERSHIP_GRAPH_VERSION)
+    graph = _graph
+    if graph is not None and graph.version == version:
+        return graph
+    with _graph_lock:
+        if _graph is None or _graph.version != version:
+            _graph = MembershipGraph.build(version)
+        return _graph
+
+
+def invalidate_membership_graph():
+    # After commit, so no worker rebuilds from rows another transaction is
+    # still writing and caches them under the new version
+    transaction.on_commit(lambda: bump_version(MEMBERSHIP_GRAPH_VERSION))
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_on_user_save(sender, instance, created, **kwargs):
+    if created or instance.role_changed():
+        invalidate_membership_graph()
+
+
+@receiver(post_save, sender=Team)
+@receiver(post_save, sender=TeamRole)
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Team)
+@receiver(post_delete, sender=TeamRole)
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_on_write(sender, **kwargs):
+    invalidate_membership_graph()
+
+
+@receiver(m2m_changed, sender=Team.members.through)
+@receiver(m2m_changed, sender=Team.account_managers.through)
+@receiver(m2m_changed, sender=Team.projects.through)
+def invalidate_on_membership_change(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_membership_graph()
@@ -0,0 +1,121 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from timesheet_app.models import Project, ProjectMembership, Team, TeamRole
+
+
+def rebuild_project_memberships(project_ids=None):
+    """
+    Recompute ProjectMembership rows for the given projects (all when None)
+    with a fixed number of queries.
+    """
+    projects = Project.objects.all()
+    if project_ids is not None:
+        project_ids = set(project_ids)
+        if not project_ids:
+            return
+        projects = projects.filter(id__in=project_ids)
+
+    rows = set()
+    team_projects = defaultdict(set)
+    for project_id, created_by_id in projects.values_list('id', 'created_by_id'):
+        rows.add((created_by_id, project_id, ProjectMembership.CREATOR))
+
+    # Hidden teams and projects are awaiting their DeletionJob and grant nothing
+    assignments = Team.projects.through.objects.filter(team__is_hidden=False, project__is_hidden=False)
+    if project_ids is not None:
+        assignments = assignments.filter(project_id__in=project_ids)
+    for team_id, project_id in assignments.values_list('team_id', 'project_id'):
+        team_projects[team_id].add(project_id)
+
+    team_users = [
+        (Team.account_managers.through.objects.filter(team_id__in=team_projects)
+            .values_list('team_id', 'customuser_id'), ProjectMembership.ACCOUNT_MANAGER),
+        (Team.members.through.objects.filter(team_id__in=team_projects)
+            .values_list('team_id', 'customuser_id'), ProjectMembership.MEMBER),
+    ]
+    team_users.append((TeamRole.objects.filter(team_id__in=team_projects, role=TeamRole.TEAM_LEADER)
+        .values_list('team_id', 'user_id'), ProjectMembership.TEAM_LEADER))
+
+    for pairs, role in team_users:
+        for team_id, user_id in pairs:
+            for project_id in team_projects[team_id]:
+                rows.add((user_id, project_id, role))
+
+    with transaction.atomic():
+        stale = ProjectMembership.objects.all()
+        if project_ids is not None:
+            stale = stale.filter(project_id__in=project_ids)
+        stale.delete()
+        ProjectMembership.objects.bulk_create(
+            [ProjectMembership(user_id=user_id, project_id=project_id, role=role) for user_id, project_id, role in rows],
+            batch_size=500,
+        )
+
+
+def team_project_ids(team_ids):
+    return set(Team.projects.through.objects.filter(team_id__in=team_ids).values_list('project_id', flat=True))
+
+
+@receiver(post_save, sender=Project)
+def sync_project_creator(sender, instance, created, **kwargs):
+    creator = ProjectMembership.objects.filter(project_id=instance.pk, role=ProjectMembership.CREATOR)
+    if created or not creator.filter(user_id=instance.created_by_id).exists():
+        creator.delete()
+        ProjectMembership.objects.create(user_id=instance.created_by_id, project_id=instance.pk, role=ProjectMembership.CREATOR)
+
+
+@receiver(post_save, sender=Team)
+def sync_team_leaders(sender, instance, created, **kwargs):
+    if not created:
+        rebuild_project_memberships(team_project_ids([instance.pk]))
+
+
+@receiver(post_save, sender=TeamRole)
+@receiver(post_delete, sender=TeamRole)
+def sync_team_role(sender, instance, **kwargs):
+    rebuild_project_memberships(team_project_ids([instance.team_id]))
+
+
+@receiver(pre_delete, sender=Team)
+def remember_team_projects(sender, instance, **kwargs):
+    instance._membership_project_ids = team_project_ids([instance.pk])
+
+
+@receiver(post_delete, sender=Team)
+def sync_deleted_team(sender, instance, **kwargs):
+    rebuild_project_memberships(getattr(instance, '_membership_project_ids', ()))
+
+
+@receiver(m2m_changed, sender=Team.members.through)
+@receiver(m2m_changed, sender=Team.account_managers.through)
+def sync_team_users(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        # team.members / team.account_managers changed
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            rebuild_project_memberships(team_project_ids([instance.pk]))
+    elif action == 'pre_clear':
+        # user.teams / user.managed_teams is about to be cleared
+        team_ids = sender.objects.filter(customuser_id=instance.pk).values('team_id')
+        instance._membership_project_ids = team_project_ids(team_ids)
+    elif action == 'post_clear':
+        rebuild_project_memberships(getattr(instance, '_membership_project_ids', ()))
+    elif action in ('post_add', 'post_remove'):
+        rebuild_project_memberships(team_project_ids(pk_set))
+
+
+@receiver(m2m_changed, sender=Team.projects.through)
+def sync_team_projects(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # project.teams_assigned changed
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            rebuild_project_memberships([instance.pk])
+    elif action == 'pre_clear':
+        instance._membership_project_ids = team_project_ids([instance.pk])
+    elif action == 'post_clear':
+        rebuild_project_memberships(getattr(instance, '_membership_project_ids', ()))
+    elif action in ('post_add', 'post_remove'):
+        rebuild_project_memberships(pk_set)
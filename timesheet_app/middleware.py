@@ -0,0 +1,25 @@
+from timesheet_app.tokens import RoleAccessToken, set_access_token_cookie
+
+
+# Response header carrying a re-issued token to Authorization header clients,
+# which should replace their stored access token with it
+ACCESS_TOKEN_HEADER = "X-Access-Token"
+
+
+# Hands a fresh access token to clients whose role claims went stale (flagged
+# by CachedJWTAuthentication when the user's role changed): as a cookie to
+# cookie clients, in ACCESS_TOKEN_HEADER to bearer header clients
+class ReissueAccessTokenMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        user = getattr(request, "reissue_access_token_for", None)
+        if user is not None and response.status_code < 400:
+            access_token = RoleAccessToken.for_user(user)
+            if getattr(request, "reissue_access_token_via", "cookie") == "header":
+                response[ACCESS_TOKEN_HEADER] = str(access_token)
+            else:
+                set_access_token_cookie(response, access_token)
+        return response
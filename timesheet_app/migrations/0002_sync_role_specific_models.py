@@ -0,0 +1,32 @@
+from django.db import migrations
+
+ROLE_MODEL_NAMES = {'Admin': 'Admin', 'TeamLeader': 'TeamLeader', 'User': 'User'}
+
+
+def sync_role_specific_models(apps, schema_editor):
+    """
+    Role rows used to be re-saved on every user save. They are now only written
+    when the usertype changes, so bring existing rows in line once: add missing
+    rows and drop rows that no longer match the user's usertype.
+    """
+    CustomUser = apps.get_model('timesheet_app', 'CustomUser')
+    for usertype, model_name in ROLE_MODEL_NAMES.items():
+        role_model = apps.get_model('timesheet_app', model_name)
+        role_model.objects.exclude(user__usertype=usertype).delete()
+        missing = CustomUser.objects.filter(usertype=usertype).exclude(
+            id__in=role_model.objects.values('user_id')
+        ).values_list('id', flat=True)
+        role_model.objects.bulk_create(
+            [role_model(user_id=user_id) for user_id in missing], batch_size=500
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timesheet_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(sync_role_specific_models, migrations.RunPython.noop),
+    ]
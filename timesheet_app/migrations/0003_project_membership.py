@@ -0,0 +1,59 @@
+# Generated by Django 4.2.20 on 2026-10-19 11:02
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_project_memberships(apps, schema_editor):
+    Project = apps.get_model('timesheet_app', 'Project')
+    Team = apps.get_model('timesheet_app', 'Team')
+    ProjectMembership = apps.get_model('timesheet_app', 'ProjectMembership')
+
+    rows = {(created_by_id, project_id, 'Creator') for project_id, created_by_id in Project.objects.values_list('id', 'created_by_id')}
+    team_projects = {}
+    for team_id, project_id in Team.projects.through.objects.values_list('team_id', 'project_id'):
+        team_projects.setdefault(team_id, set()).add(project_id)
+
+    pairs = [
+        (team_id, user_id, 'Account Manager')
+        for team_id, user_id in Team.account_managers.through.objects.values_list('team_id', 'customuser_id')
+    ] + [
+        (team_id, user_id, 'Member')
+        for team_id, user_id in Team.members.through.objects.values_list('team_id', 'customuser_id')
+    ]
+    for team_id, *leader_ids in Team.objects.values_list('id', 'team_leader_search_id', 'team_leader_development_id', 'team_leader_creative_id'):
+        pairs.extend((team_id, leader_id, 'Team Leader') for leader_id in leader_ids if leader_id)
+
+    for team_id, user_id, role in pairs:
+        for project_id in team_projects.get(team_id, ()):
+            rows.add((user_id, project_id, role))
+
+    ProjectMembership.objects.bulk_create(
+        [ProjectMembership(user_id=user_id, project_id=project_id, role=role) for user_id, project_id, role in rows],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timesheet_app', '0002_sync_role_specific_models'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectMembership',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('Creator', 'Creator'), ('Account Manager', 'Account Manager'), ('Team Leader', 'Team Leader'), ('Member', 'Member')], max_length=20)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='timesheet_app.project')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='project_memberships', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='projectmembership',
+            constraint=models.UniqueConstraint(fields=('user', 'role', 'project'), name='unique_project_membership'),
+        ),
+        migrations.RunPython(populate_project_memberships, migrations.RunPython.noop),
+    ]
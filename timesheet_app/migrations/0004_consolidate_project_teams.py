@@ -0,0 +1,55 @@
+# Generated by Django 4.2.20 on 2026-10-19 11:03
+
+from importlib import import_module
+
+from django.db import migrations
+
+
+def merge_project_teams(apps, schema_editor):
+    """Union Project.teams rows into Team.projects before the former is dropped."""
+    Project = apps.get_model('timesheet_app', 'Project')
+    Team = apps.get_model('timesheet_app', 'Team')
+    ProjectTeams = Project.teams.through
+    TeamProjects = Team.projects.through
+
+    existing = set(TeamProjects.objects.values_list('team_id', 'project_id'))
+    missing = {
+        (team_id, project_id)
+        for project_id, team_id in ProjectTeams.objects.values_list('project_id', 'team_id')
+    } - existing
+    TeamProjects.objects.bulk_create(
+        [TeamProjects(team_id=team_id, project_id=project_id) for team_id, project_id in missing],
+        batch_size=500,
+    )
+
+    if missing:
+        # Newly merged assignments change who can see those projects
+        ProjectMembership = apps.get_model('timesheet_app', 'ProjectMembership')
+        ProjectMembership.objects.all().delete()
+        import_module('timesheet_app.migrations.0003_project_membership').populate_project_memberships(apps, schema_editor)
+
+
+def split_project_teams(apps, schema_editor):
+    Project = apps.get_model('timesheet_app', 'Project')
+    Team = apps.get_model('timesheet_app', 'Team')
+    ProjectTeams = Project.teams.through
+    ProjectTeams.objects.bulk_create(
+        [ProjectTeams(project_id=project_id, team_id=team_id)
+         for team_id, project_id in Team.projects.through.objects.values_list('team_id', 'project_id')],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timesheet_app', '0003_project_membership'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_project_teams, split_project_teams),
+        migrations.RemoveField(
+            model_name='project',
+            name='teams',
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.20 on 2026-10-19 11:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timesheet_app', '0004_consolidate_project_teams'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='timesheet',
+            index=models.Index(fields=['project', 'date'], name='timesheet_project_date_idx'),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 4.2.20 on 2026-10-19 11:30
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Discipline led through each column this migration folds into TeamRole
+LEADER_COLUMNS = {
+    'Search': 'team_leader_search_id',
+    'Development': 'team_leader_development_id',
+    'Creative': 'team_leader_creative_id',
+}
+
+
+def copy_team_leaders(apps, schema_editor):
+    Team = apps.get_model('timesheet_app', 'Team')
+    TeamRole = apps.get_model('timesheet_app', 'TeamRole')
+    roles = [
+        TeamRole(team_id=team_id, user_id=user_id, role='Team Leader', discipline=discipline)
+        for team_id, *leader_ids in Team.objects.values_list('id', *LEADER_COLUMNS.values())
+        for discipline, user_id in zip(LEADER_COLUMNS, leader_ids) if user_id
+    ]
+    TeamRole.objects.bulk_create(roles, batch_size=500)
+
+
+def restore_team_leaders(apps, schema_editor):
+    Team = apps.get_model('timesheet_app', 'Team')
+    TeamRole = apps.get_model('timesheet_app', 'TeamRole')
+    for team_id, discipline, user_id in TeamRole.objects.filter(role='Team Leader').values_list('team_id', 'discipline', 'user_id'):
+        Team.objects.filter(id=team_id).update(**{LEADER_COLUMNS[discipline]: user_id})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timesheet_app', '0006_deletion_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeamRole',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('Team Leader', 'Team Leader')], default='Team Leader', max_length=20)),
+                ('discipline', models.CharField(choices=[('Search', 'Search Team'), ('Creative', 'Creative Team'), ('Development', 'Development Team')], max_length=50)),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='roles', to='timesheet_app.team')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='team_roles', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'role', 'team'], name='team_role_user_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='teamrole',
+            constraint=models.UniqueConstraint(fields=('team', 'role', 'discipline'), name='unique_team_role'),
+        ),
+        migrations.RunPython(copy_team_leaders, restore_team_leaders),
+        migrations.RemoveField(
+            model_name='team',
+            name='team_leader_search',
+        ),
+        migrations.RemoveField(
+            model_name='team',
+            name='team_leader_development',
+        ),
+        migrations.RemoveField(
+            model_name='team',
+            name='team_leader_creative',
+        ),
+    ]
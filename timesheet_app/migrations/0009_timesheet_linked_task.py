@@ -0,0 +1,23 @@
+# Generated by Django 4.2.20 on 2026-10-19 11:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timesheet_app', '0008_task_board_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timesheet',
+            name='linked_task',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='timesheets', to='timesheet_app.task'),
+        ),
+        migrations.AddIndex(
+            model_name='timesheet',
+            index=models.Index(fields=['linked_task', 'date'], name='timesheet_task_date_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.20 on 2026-10-19 11:46
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timesheet_app', '0009_timesheet_linked_task'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReminderLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('Overdue Task', 'Overdue Task'), ('Missing Timesheet', 'Missing Timesheet')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('date', models.DateField()),
+                ('sent_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('status', 'Completed'), _negated=True), fields=['end_date'], name='task_open_end_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timesheet',
+            index=models.Index(fields=['created_by', 'date'], name='timesheet_user_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='reminderlog',
+            name='recipient',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='reminderlog',
+            constraint=models.UniqueConstraint(fields=('kind', 'recipient', 'object_id', 'date'), name='unique_reminder'),
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 4.2.20 on 2026-10-19 12:38
+
+import unicodedata
+
+from django.db import migrations, models
+
+SEARCH_FIELDS = ('username', 'firstname', 'lastname', 'email')
+
+
+def populate_search_keys(apps, schema_editor):
+    # As CustomUser.search_key(), which historical models do not carry
+    CustomUser = apps.get_model('timesheet_app', 'CustomUser')
+    users = list(CustomUser.objects.only('id', *SEARCH_FIELDS))
+    for user in users:
+        for field in SEARCH_FIELDS:
+            setattr(user, f"{field}_key", unicodedata.normalize('NFC', getattr(user, field) or '').lower())
+    CustomUser.objects.bulk_update(users, [f"{field}_key" for field in SEARCH_FIELDS], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timesheet_app', '0011_user_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='customuser',
+            name='user_username_lower_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='customuser',
+            name='user_firstname_lower_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='customuser',
+            name='user_lastname_lower_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='customuser',
+            name='user_email_lower_idx',
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='email_key',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='firstname_key',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='lastname_key',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='username_key',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(populate_search_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['username_key'], name='user_username_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['firstname_key'], name='user_firstname_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['lastname_key'], name='user_lastname_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['email_key'], name='user_email_key_idx'),
+        ),
+    ]
@@ -1,4 +1,7 @@
+import unicodedata
+
 from django.db import models
+from django.db.models import Exists, OuterRef
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db.models.signals import post_save, pre_delete
 from django.dispatch import receiver
@@ -94,13 +97,103 @@ class CustomUser(AbstractUser):
     team = models.CharField(max_length=50, choices=TEAM_CHOICES, null=True, blank=True)
     subteam = models.CharField(max_length=50, choices=SUBTEAM_CHOICES, null=True, blank=True)
     chat_id = models.CharField(max_length=50, default='1234567890') 
+    # search_key() of each SEARCH_FIELDS entry, kept in step by save()
+    username_key = models.CharField(max_length=255, default='', editable=False)
+    firstname_key = models.CharField(max_length=255, default='', editable=False)
+    lastname_key = models.CharField(max_length=255, default='', editable=False)
+    email_key = models.CharField(max_length=255, default='', editable=False)
     
     objects = CustomUserManager()
 
+    # Fields whose change invalidates the role claims signed into issued tokens
+    # (and the membership graph, which lists users by them). Every token claim
+    # (tokens.CLAIM_FIELDS) must be listed, or a rename would keep the old
+    # username in tokens until they expire; is_active is checked on top.
+    ROLE_FIELDS = ('username', 'usertype', 'team', 'subteam', 'is_active')
+
+    # Matched by prefix, case-insensitively, in the user directory search,
+    # through the indexed <field>_key column holding search_key(field). The
+    # database's LOWER() cannot be used: SQLite's only folds ASCII.
+    SEARCH_FIELDS = ('username', 'firstname', 'lastname', 'email')
+
     class Meta:
         verbose_name = "Custom User"
         verbose_name_plural = "Custom Users"
-        
+        indexes = [
+            # Prefix ranges for SearchUsersView, one per SEARCH_FIELDS entry
+            models.Index(fields=['username_key'], name='user_username_key_idx'),
+            models.Index(fields=['firstname_key'], name='user_firstname_key_idx'),
+            models.Index(fields=['lastname_key'], name='user_lastname_key_idx'),
+            models.Index(fields=['email_key'], name='user_email_key_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_role = instance.get_role()
+        return instance
+
+    @classmethod
+    def from_token_claims(cls, validated_token):
+        """Build a user from signed token claims; other fields load on first access."""
+        from rest_framework_simplejwt.settings import api_settings
+        from timesheet_app.tokens import CLAIM_FIELDS
+
+        claims = {claim: validated_token[claim] for claim in CLAIM_FIELDS}
+        claims.update(id=validated_token[api_settings.USER_ID_CLAIM], is_active=True)
+        # from_db expects values in concrete field order
+        field_names = [field.attname for field in cls._meta.concrete_fields if field.attname in claims]
+        return cls.from_db('default', field_names, [claims[name] for name in field_names])
+
+    def get_role(self):
+        deferred = self.get_deferred_fields()
+        return tuple(None if field in deferred else getattr(self, field) for field in self.ROLE_FIELDS)
+
+    def role_changed(self, field=None):
+        """Whether the last save changed the role fields (or just `field`)."""
+        previous = getattr(self, '_previous_role', None)
+        if previous is None:
+            return True
+        current = self.get_role()
+        if field is None:
+            return previous != current
+        index = self.ROLE_FIELDS.index(field)
+        return previous[index] != current[index]
+
+    @staticmethod
+    def search_key(value):
+        """`value` as stored in the search key columns: NFC-normalized, lowercased."""
+        return unicodedata.normalize('NFC', value or '').lower()
+
+    def set_search_keys(self, fields=SEARCH_FIELDS):
+        """Recompute the key columns of `fields`; returns the key column names."""
+        keys = []
+        for field in fields:
+            setattr(self, f"{field}_key", self.search_key(getattr(self, field)))
+            keys.append(f"{field}_key")
+        return keys
+
+    def save(self, *args, **kwargs):
+        self._previous_role = getattr(self, '_loaded_role', None)
+        update_fields = kwargs.get('update_fields')
+        # Only loaded fields, as a save of a deferred instance writes only those
+        deferred = self.get_deferred_fields()
+        keys = self.set_search_keys([
+            field for field in self.SEARCH_FIELDS
+            if field not in deferred and (update_fields is None or field in update_fields)
+        ])
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, *keys}
+        super().save(*args, **kwargs)
+        self._loaded_role = self.get_role()
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        # Touching one deferred field loads all of them in a single query
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred and set(fields) <= deferred:
+            fields = list(deferred)
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+
     # def save(self, *args, **kwargs):
     #     """Ensure user is also stored in MongoDB when created via Django Admin."""
     #     super().save(*args, **kwargs)  # Save in Django DB
@@ -188,6 +281,13 @@ class User(models.Model):
     def __str__(self):
         return self.user.username
 
+# Default manager for models deleted through a DeletionJob: rows are hidden
+# as soon as deletion is requested, so they drop out of every listing and
+# lookup while the job removes them. `all_objects` still sees them.
+class VisibleManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().filter(is_hidden=False)
+
 # Project Model
 class Project(models.Model):
     STATUS_CHOICES = [
@@ -202,7 +302,12 @@ class Project(models.Model):
     start_date = models.DateField()
     deadline = models.DateField()
     created_by = models.ForeignKey(CustomUser, related_name='created_projects', on_delete=models.CASCADE, default=1)  
-    teams = models.ManyToManyField('Team', related_name='projects_assigned') 
+    # Teams are assigned through Team.projects (reverse accessor: project.teams_assigned)
+    is_hidden = models.BooleanField(default=False, db_index=True)
+
+    objects = VisibleManager()
+    all_objects = models.Manager()
+
     def __str__(self):
         return self.name
     
@@ -228,16 +333,38 @@ class Team(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField()
     account_managers = models.ManyToManyField(CustomUser, related_name='managed_teams')  
-    team_leader_search = models.ForeignKey(CustomUser, related_name='led_search_teams', on_delete=models.CASCADE, null=True, blank=True)
-    team_leader_development = models.ForeignKey(CustomUser, related_name='led_development_teams', on_delete=models.CASCADE, null=True, blank=True)
-    team_leader_creative = models.ForeignKey(CustomUser, related_name='led_creative_teams', on_delete=models.CASCADE, null=True, blank=True)
     team = models.CharField(max_length=50, choices=CustomUser.TEAM_CHOICES)
     subteam = models.CharField(max_length=50, choices=CustomUser.SUBTEAM_CHOICES, null=True, blank=True)
     members = models.ManyToManyField(CustomUser, related_name='teams')
     created_by = models.ForeignKey(CustomUser, related_name='created_teams', on_delete=models.CASCADE, default=1)
-    projects = models.ManyToManyField(Project, related_name='teams_assigned')  
+    projects = models.ManyToManyField(Project, related_name='teams_assigned')  # the only team <-> project relation
+    is_hidden = models.BooleanField(default=False, db_index=True)
+
+    objects = VisibleManager()
+    all_objects = models.Manager()
+
     def __str__(self):
         return self.name
+
+    def leader(self, discipline):
+        """The user leading `discipline` in this team, from prefetched roles when present."""
+        for team_role in self.roles.all():
+            if team_role.role == TeamRole.TEAM_LEADER and team_role.discipline == discipline:
+                return team_role.user
+        return None
+
+    # Read-only stand-ins for the team_leader_* columns TeamRole replaced
+    @property
+    def team_leader_search(self):
+        return self.leader('Search')
+
+    @property
+    def team_leader_development(self):
+        return self.leader('Development')
+
+    @property
+    def team_leader_creative(self):
+        return self.leader('Creative')
     
     # def save(self, *args, **kwargs):
     #     """Insert new team data into MongoDB when saving."""
@@ -268,6 +395,59 @@ class Team(models.Model):
     #     super().delete(*args, **kwargs)
     #     team_collection.delete_one({"name": self.name})
 
+# A user's role in a team; a team has at most one leader per discipline
+class TeamRole(models.Model):
+    TEAM_LEADER = 'Team Leader'
+    ROLE_CHOICES = [
+        (TEAM_LEADER, 'Team Leader'),
+    ]
+    # In the order the team_leader_* columns were declared
+    DISCIPLINES = ('Search', 'Development', 'Creative')
+
+    team = models.ForeignKey(Team, related_name='roles', on_delete=models.CASCADE)
+    user = models.ForeignKey(CustomUser, related_name='team_roles', on_delete=models.CASCADE)
+    role = models.CharField(max_length=20, choices=ROLE_CHOICES, default=TEAM_LEADER)
+    discipline = models.CharField(max_length=50, choices=CustomUser.TEAM_CHOICES)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['team', 'role', 'discipline'], name='unique_team_role'),
+        ]
+        indexes = [
+            # "Teams I lead" is one equality lookup on (user, role)
+            models.Index(fields=['user', 'role', 'team'], name='team_role_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} is {self.discipline} {self.role} of team {self.team_id}"
+
+# Denormalized "who can see which project" index, derived from Project.created_by
+# and the teams assigned to each project. Kept in sync by timesheet_app.memberships;
+# rebuild with `manage.py rebuild_project_memberships`.
+class ProjectMembership(models.Model):
+    CREATOR = 'Creator'
+    ACCOUNT_MANAGER = 'Account Manager'
+    TEAM_LEADER = 'Team Leader'
+    MEMBER = 'Member'
+    ROLE_CHOICES = [
+        (CREATOR, 'Creator'),
+        (ACCOUNT_MANAGER, 'Account Manager'),
+        (TEAM_LEADER, 'Team Leader'),
+        (MEMBER, 'Member'),
+    ]
+
+    user = models.ForeignKey(CustomUser, related_name='project_memberships', on_delete=models.CASCADE)
+    project = models.ForeignKey(Project, related_name='memberships', on_delete=models.CASCADE)
+    role = models.CharField(max_length=20, choices=ROLE_CHOICES)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'role', 'project'], name='unique_project_membership'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} is {self.role} of project {self.project_id}"
+
 # Task Model
 class Task(models.Model):
     STATUS_CHOICES = [
@@ -276,6 +456,16 @@ class Task(models.Model):
         ('Review', 'Review'),
         ('Completed', 'Completed'),
     ]
+    # Lowest first; the board sorts priority in this order rather than alphabetically
+    PRIORITY_LEVELS = ('Low', 'Medium', 'High')
+
+    # Each usertype assigns tasks one level down, recorded in its own column
+    ASSIGNABLE_USERTYPES = {'SuperAdmin': 'Admin', 'Admin': 'TeamLeader', 'TeamLeader': 'User'}
+    ASSIGNMENT_FIELDS = {
+        'SuperAdmin': 'superadmin_assigned_to',
+        'Admin': 'admin_assigned_to',
+        'TeamLeader': 'teamleader_assigned_to',
+    }
 
     project = models.ForeignKey(Project, related_name='tasks', on_delete=models.CASCADE)
     title = models.CharField(max_length=100)
@@ -290,7 +480,15 @@ class Task(models.Model):
     superadmin_assigned_to = models.ForeignKey(CustomUser, related_name='superadmin_tasks', on_delete=models.SET_NULL, null=True, blank=True)
     admin_assigned_to = models.ForeignKey(CustomUser, related_name='admin_tasks', on_delete=models.SET_NULL, null=True, blank=True)
     teamleader_assigned_to = models.ForeignKey(CustomUser, related_name='teamleader_tasks', on_delete=models.SET_NULL, null=True, blank=True)
-    
+
+    class Meta:
+        indexes = [
+            # Task board columns (status) by due date, and per-project boards
+            models.Index(fields=['status', 'end_date'], name='task_status_end_date_idx'),
+            models.Index(fields=['project', 'status'], name='task_project_status_idx'),
+            # Overdue scan (end_date < today) over open tasks only
+            models.Index(fields=['end_date'], name='task_open_end_date_idx', condition=~models.Q(status='Completed')),
+        ]
     
     def __str__(self):
         return self.title
@@ -317,21 +515,39 @@ class Task(models.Model):
     #         "teamleader_assigned_to": self.teamleader_assigned_to.username if self.teamleader_assigned_to else None
     #     })
 
-    def assign_task(self, assigned_by, assigned_to):
-        if assigned_by.usertype == 'SuperAdmin':
-            self.superadmin_assigned_to = assigned_to
-        elif assigned_by.usertype == 'Admin':
-            self.admin_assigned_to = assigned_to
-        elif assigned_by.usertype == 'TeamLeader':
-            self.teamleader_assigned_to = assigned_to
-            
-        self.save()
+    @classmethod
+    def assignment_error(cls, assigner_usertype, assignee_usertype):
+        """Why a user of one type may not assign a task to the other, or None."""
+        allowed = cls.ASSIGNABLE_USERTYPES.get(assigner_usertype)
+        if allowed is None:
+            return f"{assigner_usertype} cannot assign tasks"
+        if assignee_usertype != allowed:
+            return f"{assigner_usertype} can only assign tasks to {allowed}s"
+        return None
+
+    def assign_task(self, assigned_by, assigned_to, save=True):
+        field = self.ASSIGNMENT_FIELDS.get(assigned_by.usertype)
+        if field:
+            setattr(self, field, assigned_to)
+        if save:
+            self.save()
     
     # def delete(self, *args, **kwargs):
     #     """Delete task from MongoDB when removed from Django."""
     #     super().delete(*args, **kwargs)
     #     task_collection.delete_one({"title": self.title})
 
+class TimesheetQuerySet(models.QuerySet):
+    def visible(self):
+        """
+        Timesheets outside hidden projects and not held only by hidden tables,
+        i.e. none a DeletionJob is about to delete.
+        """
+        tables = TimesheetTable.timesheets.through.objects.filter(timesheet_id=OuterRef('pk'))
+        return self.exclude(project__is_hidden=True).filter(
+            ~Exists(tables.filter(timesheettable__is_hidden=True)) | Exists(tables.filter(timesheettable__is_hidden=False))
+        )
+
 # Timesheet Model
 class Timesheet(models.Model):
     STATUS_CHOICES = [
@@ -349,6 +565,28 @@ class Timesheet(models.Model):
     hours = models.DecimalField(max_digits=5, decimal_places=1)
     created_by = models.ForeignKey(CustomUser, related_name='created_timesheets', on_delete=models.CASCADE)
     project = models.ForeignKey(Project, related_name='timesheets', on_delete=models.CASCADE, null=True, blank=True)
+    # The Task the free-text `task` refers to, when it names exactly one task
+    # of the project (see timesheet_app.task_links); indexed below
+    linked_task = models.ForeignKey(Task, related_name='timesheets', on_delete=models.SET_NULL, null=True, blank=True, db_index=False)
+
+    objects = TimesheetQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Serves the per-project date-range scans of the project dashboard
+            models.Index(fields=['project', 'date'], name='timesheet_project_date_idx'),
+            # Per-task hours by day; also serves plain linked_task lookups
+            models.Index(fields=['linked_task', 'date'], name='timesheet_task_date_idx'),
+            # "Has this user logged this day" probes of the missing-timesheet reminder
+            models.Index(fields=['created_by', 'date'], name='timesheet_user_date_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so moving a timesheet invalidates both projects' dashboards
+        instance._loaded_project_id = instance.__dict__.get('project_id')
+        return instance
 
     def __str__(self):
         return f"Timesheet for {self.created_by.username} on {self.date}"
@@ -388,6 +626,10 @@ class TimesheetTable(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=50, choices=STATUS_CHOICES, default='Pending Review')
     comments = models.TextField(blank=True, null=True)
+    is_hidden = models.BooleanField(default=False, db_index=True)
+
+    objects = VisibleManager()
+    all_objects = models.Manager()
 
     def __str__(self):
         return f"Timesheet Table created by {self.created_by.username} on {self.created_at}"
@@ -417,26 +659,90 @@ class TimesheetTable(models.Model):
             if not timesheet.timesheet_tables.exists():
                 timesheet.delete()
 
-# Signals to automatically create role-specific models
-@receiver(post_save, sender=CustomUser)
-def create_role_specific_model(sender, instance, created, **kwargs):
-    if created:
-        if instance.usertype == 'Admin':
-            Admin.objects.create(user=instance)
-        elif instance.usertype == 'TeamLeader':
-            TeamLeader.objects.create(user=instance)
-        elif instance.usertype == 'User':
-            User.objects.create(user=instance)
+# Background cascade delete of a hidden Project, Team or TimesheetTable, run in
+# fixed-size chunks by timesheet_app.deletions. `step` and `deleted_rows` are
+# saved after every chunk, so an interrupted job resumes where it stopped.
+class DeletionJob(models.Model):
+    PENDING = 'Pending'
+    RUNNING = 'Running'
+    COMPLETED = 'Completed'
+    FAILED = 'Failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (COMPLETED, 'Completed'),
+        (FAILED, 'Failed'),
+    ]
+    MODEL_CHOICES = [
+        ('Project', 'Project'),
+        ('Team', 'Team'),
+        ('TimesheetTable', 'TimesheetTable'),
+    ]
 
-@receiver(post_save, sender=CustomUser)
-def save_role_specific_model(sender, instance, **kwargs):
-    if instance.usertype == 'Admin':
-        instance.admin.save()
-    elif instance.usertype == 'TeamLeader':
-        instance.teamleader.save()
-    elif instance.usertype == 'User':
-        instance.user.save()
+    model = models.CharField(max_length=50, choices=MODEL_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    object_repr = models.CharField(max_length=255)
+    requested_by = models.ForeignKey(CustomUser, related_name='deletion_jobs', on_delete=models.SET_NULL, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    step = models.PositiveIntegerField(default=0)
+    total_rows = models.PositiveIntegerField(default=0)
+    deleted_rows = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
 
+    def __str__(self):
+        return f"Delete {self.model} {self.object_id} ({self.status})"
+
+    @property
+    def progress(self):
+        if self.status == self.COMPLETED:
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(99, int(100 * self.deleted_rows / self.total_rows))
+
+# One row per reminder sent, so scheduled reminder runs never repeat one (see
+# timesheet_app.reminders). `object_id` is the overdue Task or the user missing
+# a timesheet, and `date` the task's deadline or the workday.
+class ReminderLog(models.Model):
+    OVERDUE_TASK = 'Overdue Task'
+    MISSING_TIMESHEET = 'Missing Timesheet'
+    KIND_CHOICES = [
+        (OVERDUE_TASK, 'Overdue Task'),
+        (MISSING_TIMESHEET, 'Missing Timesheet'),
+    ]
 
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    recipient = models.ForeignKey(CustomUser, related_name='reminders', on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    date = models.DateField()
+    sent_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'recipient', 'object_id', 'date'], name='unique_reminder'),
+        ]
 
+    def __str__(self):
+        return f"{self.kind} reminder to {self.recipient_id} for {self.object_id} on {self.date}"
+
+# Role-specific model for each usertype (SuperAdmin has none)
+ROLE_MODELS = {'Admin': Admin, 'TeamLeader': TeamLeader, 'User': User}
 
+# Signal to keep the role-specific model in step with the usertype. Role rows
+# are only written when a user is created or their usertype changes, so an
+# ordinary user save is a single UPDATE.
+@receiver(post_save, sender=CustomUser)
+def sync_role_specific_model(sender, instance, created, **kwargs):
+    if not created and not instance.role_changed('usertype'):
+        return
+    for usertype, role_model in ROLE_MODELS.items():
+        if usertype == instance.usertype:
+            if created:
+                role_model.objects.create(user=instance)
+            else:
+                role_model.objects.get_or_create(user=instance)
+        elif not created:
+            role_model.objects.filter(user=instance).delete()
@@ -0,0 +1,19 @@
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.settings import api_settings
+
+# ?format= values that pick a payload shape rather than a renderer
+NORMALIZED_FORMAT = 'normalized'
+PAYLOAD_FORMATS = (NORMALIZED_FORMAT,)
+
+
+# DRF reads ?format= as a renderer override and 404s on values no renderer
+# claims; payload formats are left to the view and rendered as plain JSON
+class PayloadFormatNegotiation(DefaultContentNegotiation):
+    def filter_renderers(self, renderers, format):
+        if format in PAYLOAD_FORMATS:
+            return renderers
+        return super().filter_renderers(renderers, format)
+
+
+def wants_normalized(request):
+    return request.query_params.get(api_settings.URL_FORMAT_OVERRIDE) == NORMALIZED_FORMAT
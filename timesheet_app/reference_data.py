@@ -0,0 +1,61 @@
+import hashlib
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from rest_framework.renderers import JSONRenderer
+
+from timesheet_app.cache import bump_version, get_version, shared_cache
+from timesheet_app.models import CustomUser, Team
+
+# User lists and choice lists read on almost every page load. Their rendered
+# JSON is cached per scope under this counter, which user and team writes move.
+REFERENCE_DATA_VERSION = "reference_data"
+# Bounds staleness from writes that send no signal, such as queryset.update()
+REFERENCE_DATA_CACHE_TIMEOUT = 3600
+
+
+def reference_data_response(request, name, scope, build):
+    """
+    The JSON of build() as a plain HttpResponse, rendered once per data
+    version and scope and then served from shared_cache as bytes, with a
+    strong ETag; a matching If-None-Match gets a 304.
+    """
+    version = get_version(REFERENCE_DATA_VERSION)
+    key = f"reference_{name}_{scope}_{version}"
+    cached = shared_cache.get(key)
+    if cached is None:
+        body = JSONRenderer().render(build())
+        cached = (body, f'"{hashlib.md5(body).hexdigest()}"')
+        shared_cache.set(key, cached, timeout=REFERENCE_DATA_CACHE_TIMEOUT)
+    body, etag = cached
+
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    # Per-user scopes: browsers may keep a copy but must revalidate it
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def invalidate_reference_data():
+    # After commit, so no request caches rows another transaction is still writing
+    transaction.on_commit(lambda: bump_version(REFERENCE_DATA_VERSION))
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_on_user_save(sender, instance, created, **kwargs):
+    # Reference payloads only carry ids and role fields
+    if created or instance.role_changed():
+        invalidate_reference_data()
+
+
+@receiver(post_delete, sender=CustomUser)
+@receiver(post_save, sender=Team)
+@receiver(post_delete, sender=Team)
+def invalidate_on_write(sender, **kwargs):
+    invalidate_reference_data()
@@ -0,0 +1,168 @@
+from collections import defaultdict
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.functions import TruncDate
+
+from timesheet_app.models import CustomUser, ReminderLog, Task, Timesheet
+from timesheet_app.utils import queue_telegram_message
+
+# Weekdays (Monday is 0) a timesheet is expected for
+WORKDAYS = getattr(settings, "REMINDER_WORKDAYS", (0, 1, 2, 3, 4))
+# Usertypes that log timesheets
+TIMESHEET_USERTYPES = ('TeamLeader', 'User')
+# Lines per digest section, so a digest stays within one Telegram message
+DIGEST_SECTION_LIMIT = 30
+
+OVERDUE_TASKS_HEADING = "⏰ <b>Your Overdue Tasks</b>"
+ASSIGNED_OVERDUE_TASKS_HEADING = "⏰ <b>Overdue Tasks You Assigned</b>"
+MISSING_TIMESHEETS_HEADING = "📝 <b>Timesheets Not Logged</b>"
+TEAM_MISSING_TIMESHEETS_HEADING = "📝 <b>Team Timesheets Not Logged</b>"
+
+
+def workdays(start, end):
+    """The workdays from `start` to `end`, inclusive."""
+    days = []
+    day = start
+    while day <= end:
+        if day.weekday() in WORKDAYS:
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def previous_workdays(before, count):
+    """The `count` workdays before `before`, oldest first."""
+    days = []
+    day = before
+    while len(days) < count:
+        day -= timedelta(days=1)
+        if day.weekday() in WORKDAYS:
+            days.append(day)
+    return days[::-1]
+
+
+def overdue_tasks(today):
+    """Open tasks past their end_date, read through task_open_end_date_idx."""
+    return Task.objects.filter(end_date__lt=today, project__is_hidden=False).exclude(status='Completed')
+
+
+def missing_timesheets(days):
+    """
+    (user_id, day) for each of `days` a timesheet user logged nothing on, in
+    one query: the timesheet users crossed with a calendar of `days` built
+    from VALUES, anti-joined once against Timesheet on timesheet_user_date_idx.
+    """
+    if not days:
+        return []
+    users = (
+        CustomUser.objects.filter(usertype__in=TIMESHEET_USERTYPES, is_active=True)
+        .annotate(joined=TruncDate('date_joined'))
+        .values('id', 'joined')
+    )
+    users_sql, users_params = users.query.sql_with_params()
+    # MySQL spells a VALUES row in a table constructor ROW(...)
+    row = "ROW(%s)" if connection.vendor == 'mysql' else "(%s)"
+    quote = connection.ops.quote_name
+    sql = (
+        f"WITH calendar (day) AS (VALUES {', '.join([row] * len(days))}) "
+        f"SELECT u.id, calendar.day FROM ({users_sql}) u CROSS JOIN calendar "
+        f"WHERE u.joined <= calendar.day AND NOT EXISTS ("
+        f"SELECT 1 FROM {quote(Timesheet._meta.db_table)} t "
+        f"WHERE t.{quote('created_by_id')} = u.id AND t.{quote('date')} = calendar.day)"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*days, *users_params])
+        rows = cursor.fetchall()
+    # SQLite hands dates back as text
+    by_value = {str(day): day for day in days}
+    return [(user_id, by_value[str(day)]) for user_id, day in rows]
+
+
+# Reminders are (recipient_id, object_id, date, heading, line) tuples; the
+# first three identify it in ReminderLog
+
+def overdue_task_reminders(today):
+    """Assignees hear of their overdue tasks, and creators of those they assigned."""
+    assignment_fields = [f"{field}_id" for field in Task.ASSIGNMENT_FIELDS.values()]
+    tasks = (
+        overdue_tasks(today)
+        .select_related('project')
+        .only('id', 'title', 'status', 'end_date', 'created_by_id', 'project__name', *assignment_fields)
+        .order_by('end_date', 'id')
+    )
+    reminders = []
+    for task in tasks:
+        line = f"<b>{task.title}</b> ({task.project.name}), 📅 {task.end_date}, {task.status}"
+        assignees = {getattr(task, field) for field in assignment_fields} - {None}
+        for assignee_id in sorted(assignees):
+            reminders.append((assignee_id, task.id, task.end_date, OVERDUE_TASKS_HEADING, line))
+        if task.created_by_id not in assignees:
+            reminders.append((task.created_by_id, task.id, task.end_date, ASSIGNED_OVERDUE_TASKS_HEADING, line))
+    return reminders
+
+
+def missing_timesheet_reminders(days):
+    """
+    Users hear of the workdays they logged nothing on, and each TeamLeader of
+    the same users FetchWorkingHoursView shows them: those of their team.
+    """
+    missing = sorted(missing_timesheets(days), key=lambda row: (row[1], row[0]))
+    users = CustomUser.objects.only('id', 'username', 'team').in_bulk({user_id for user_id, _ in missing})
+    leaders = defaultdict(list)
+    for leader_id, team in CustomUser.objects.filter(usertype='TeamLeader', is_active=True, team__isnull=False).values_list('id', 'team'):
+        leaders[team].append(leader_id)
+
+    reminders = []
+    for user_id, day in missing:
+        user = users[user_id]
+        reminders.append((user_id, user_id, day, MISSING_TIMESHEETS_HEADING, f"{day:%a} {day}"))
+        for leader_id in leaders.get(user.team, ()):
+            if leader_id != user_id:
+                reminders.append((leader_id, user_id, day, TEAM_MISSING_TIMESHEETS_HEADING, f"<b>{user.username}</b>, {day:%a} {day}"))
+    return reminders
+
+
+def reminder_digest(sections):
+    lines = []
+    for heading, items in sections.items():
+        lines.append(f"{heading}\n")
+        lines.extend(f"🔹 {item}" for item in items[:DIGEST_SECTION_LIMIT])
+        if len(items) > DIGEST_SECTION_LIMIT:
+            lines.append(f"… and {len(items) - DIGEST_SECTION_LIMIT} more")
+        lines.append("")
+    return "\n".join(lines).rstrip()
+
+
+def send_reminders(kind, reminders, dry_run=False):
+    """
+    Queue one digest per recipient of the reminders not logged yet, and log
+    them. Recipients without a chat_id are skipped and not logged, so they
+    are reminded once they link Telegram. Returns (digests, reminders) sent.
+    """
+    if not reminders:
+        return 0, 0
+    dates = [date for _, _, date, _, _ in reminders]
+    sent = set(
+        ReminderLog.objects.filter(kind=kind, date__gte=min(dates), date__lte=max(dates))
+        .values_list('recipient_id', 'object_id', 'date')
+    )
+    recipients = CustomUser.objects.only('id', 'chat_id').in_bulk({recipient_id for recipient_id, *_ in reminders})
+
+    digests = defaultdict(lambda: defaultdict(list))
+    logs = []
+    for recipient_id, object_id, date, heading, line in reminders:
+        recipient = recipients.get(recipient_id)
+        if not recipient or not recipient.chat_id or (recipient_id, object_id, date) in sent:
+            continue
+        digests[recipient_id][heading].append(line)
+        logs.append(ReminderLog(kind=kind, recipient_id=recipient_id, object_id=object_id, date=date))
+
+    if not dry_run:
+        with transaction.atomic():
+            ReminderLog.objects.bulk_create(logs, ignore_conflicts=True)
+            for recipient_id, sections in digests.items():
+                transaction.on_commit(partial(queue_telegram_message, recipients[recipient_id].chat_id, reminder_digest(sections)))
+    return len(digests), len(logs)
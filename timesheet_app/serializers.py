@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import CustomUser, Timesheet, TimesheetTable, Project, Team
+from .models import CustomUser, Timesheet, TimesheetTable, Project, Team, Task
+from .task_links import LINKED_TASK_PROJECT_ERROR, link_timesheets
 
 
 # CustomUserSerializer is used to serialize the CustomUser model
@@ -13,10 +14,19 @@ class TimesheetSerializer(serializers.ModelSerializer):
     submitted_to = serializers.SlugRelatedField(slug_field='username', queryset=CustomUser.objects.all())
     created_by = serializers.SlugRelatedField(slug_field='username', queryset=CustomUser.objects.all())
     project = serializers.SlugRelatedField(slug_field='name', queryset=Project.objects.all(), allow_null=True, required=False)
+    # Matched from `task` on create when not given (see timesheet_app.task_links)
+    linked_task = serializers.PrimaryKeyRelatedField(queryset=Task.objects.all(), allow_null=True, required=False)
 
     class Meta:
         model = Timesheet
-        fields = ['id', 'date', 'task', 'submitted_to', 'status', 'description', 'hours', 'created_by', 'project']
+        fields = ['id', 'date', 'task', 'submitted_to', 'status', 'description', 'hours', 'created_by', 'project', 'linked_task']
+
+    def validate(self, data):
+        linked_task = data.get('linked_task')
+        project = data.get('project')
+        if linked_task and (project is None or linked_task.project_id != project.id):
+            raise serializers.ValidationError({"linked_task": LINKED_TASK_PROJECT_ERROR})
+        return data
 
 # TimesheetTableSerializer is used to serialize the TimesheetTable model
 class TimesheetTableSerializer(serializers.ModelSerializer):
@@ -31,8 +41,9 @@ class TimesheetTableSerializer(serializers.ModelSerializer):
         timesheets_data = validated_data.pop('timesheets')
         created_by = validated_data.pop('created_by', None)
         timesheet_table = TimesheetTable.objects.create(created_by=created_by, **validated_data)
-        for timesheet_data in timesheets_data:
-            timesheet = Timesheet.objects.create(**timesheet_data)
+        timesheets = link_timesheets([Timesheet(**timesheet_data) for timesheet_data in timesheets_data])
+        for timesheet in timesheets:
+            timesheet.save()
             timesheet_table.timesheets.add(timesheet)
         return timesheet_table
 
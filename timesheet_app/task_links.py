@@ -0,0 +1,96 @@
+from django.db import transaction
+
+from timesheet_app.models import Task, Timesheet
+
+# Timesheets scanned per backfill transaction
+BACKFILL_CHUNK_SIZE = 500
+
+
+def task_title_key(text):
+    """Timesheet text and task titles match ignoring case and runs of whitespace."""
+    return " ".join((text or "").split()).casefold()
+
+
+class TaskTitleIndex:
+    """
+    {(project_id, title key): task_id} for titles that name exactly one task
+    of their project, loaded one query per batch of new projects.
+    """
+
+    def __init__(self):
+        self.matches = {}
+        self.loaded_projects = set()
+
+    def load(self, project_ids):
+        project_ids = set(project_ids) - self.loaded_projects - {None}
+        if not project_ids:
+            return
+        ambiguous = set()
+        for task_id, project_id, title in Task.objects.filter(project_id__in=project_ids).values_list('id', 'project_id', 'title'):
+            key = (project_id, task_title_key(title))
+            if key in self.matches:
+                # Shared titles cannot be attributed reliably
+                ambiguous.add(key)
+            self.matches[key] = task_id
+        for key in ambiguous:
+            del self.matches[key]
+        self.loaded_projects |= project_ids
+
+    def match(self, project_id, text):
+        return self.matches.get((project_id, task_title_key(text)))
+
+
+LINKED_TASK_PROJECT_ERROR = "The task must belong to the timesheet's project."
+
+
+def invalid_task_links(timesheets):
+    """Timesheets linked to a missing task or to one of another project, with one query."""
+    task_ids = {timesheet.linked_task_id for timesheet in timesheets} - {None}
+    task_projects = dict(Task.objects.filter(id__in=task_ids).values_list('id', 'project_id')) if task_ids else {}
+    return [
+        timesheet for timesheet in timesheets
+        if timesheet.linked_task_id is not None
+        and task_projects.get(timesheet.linked_task_id, object()) != timesheet.project_id
+    ]
+
+
+def link_timesheets(timesheets):
+    """Set linked_task on unsaved or unlinked timesheets from their text, with one query."""
+    index = TaskTitleIndex()
+    index.load(timesheet.project_id for timesheet in timesheets)
+    for timesheet in timesheets:
+        if timesheet.linked_task_id is None:
+            timesheet.linked_task_id = index.match(timesheet.project_id, timesheet.task)
+    return timesheets
+
+
+def backfill_linked_tasks(chunk_size=BACKFILL_CHUNK_SIZE, relink=False):
+    """
+    Link existing timesheets to tasks by title within their project, in
+    pk-ordered chunks so no transaction is long. Unmatched timesheets keep a
+    null link; with `relink`, already linked ones are matched again.
+    Returns (scanned, linked).
+    """
+    timesheets = Timesheet.objects.filter(project__isnull=False)
+    if not relink:
+        timesheets = timesheets.filter(linked_task__isnull=True)
+
+    index = TaskTitleIndex()
+    scanned = linked = 0
+    last_pk = 0
+    while True:
+        rows = list(timesheets.filter(pk__gt=last_pk).order_by('pk').values_list('pk', 'project_id', 'task', 'linked_task_id')[:chunk_size])
+        if not rows:
+            return scanned, linked
+        last_pk = rows[-1][0]
+        scanned += len(rows)
+
+        index.load(project_id for _, project_id, _, _ in rows)
+        changed = []
+        for pk, project_id, text, linked_task_id in rows:
+            task_id = index.match(project_id, text)
+            if task_id != linked_task_id and (task_id or relink):
+                changed.append(Timesheet(pk=pk, linked_task_id=task_id))
+        with transaction.atomic():
+            Timesheet.objects.bulk_update(changed, ['linked_task'])
+        linked += sum(1 for timesheet in changed if timesheet.linked_task_id)
@@ -1,3 +1,653 @@
-from django.test import TestCase
+import datetime
+import io
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test import Client, TestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from timesheet_app.authentication import token_cache, user_cache
+from timesheet_app.cache import bump_version, get_version, shared_cache, version_key
+from timesheet_app.dashboards import build_task_hours, dashboard_version_name
+from timesheet_app.deletions import delete_in_chunks, run_deletion_job, schedule_deletion
+from timesheet_app.membership_graph import MEMBERSHIP_GRAPH_VERSION, get_membership_graph
+from timesheet_app.middleware import ACCESS_TOKEN_HEADER
+from timesheet_app.models import (
+    Admin, CustomUser, DeletionJob, Project, ProjectMembership, Task, Team, TeamLeader, TeamRole, Timesheet, TimesheetTable, User,
+)
+from timesheet_app.reminders import (
+    ASSIGNED_OVERDUE_TASKS_HEADING, OVERDUE_TASKS_HEADING, TEAM_MISSING_TIMESHEETS_HEADING, missing_timesheets, previous_workdays,
+)
+from timesheet_app.tokens import CLAIM_FIELDS, RoleAccessToken
+from timesheet_app.user_import import IMPORT_REQUEST_MAX_ROWS, import_users
+from timesheet_app.views.user_views import prefix_range
+
+
+class RoleFieldsTests(TestCase):
+    def test_every_token_claim_is_a_role_field(self):
+        self.assertLessEqual(set(CLAIM_FIELDS), set(CustomUser.ROLE_FIELDS))
+
+    def test_rename_counts_as_role_change(self):
+        user = CustomUser.objects.create_user('ana', 'pw', usertype='User', email='ana@example.com')
+        user = CustomUser.objects.get(pk=user.pk)
+        user.username = 'ana2'
+        user.save()
+        self.assertTrue(user.role_changed('username'))
+
+
+
+class VersionCounterTests(TestCase):
+    def test_evicted_counter_never_repeats(self):
+        first = get_version('test_counter')
+        bumped = bump_version('test_counter')
+        shared_cache.delete(version_key('test_counter'))
+        self.assertNotIn(get_version('test_counter'), (first, bumped))
+
+    def test_bump_of_evicted_counter_is_new(self):
+        first = get_version('test_counter')
+        shared_cache.delete(version_key('test_counter'))
+        self.assertNotEqual(bump_version('test_counter'), first)
+
+
+class UserSaveQueryTests(TestCase):
+    def setUp(self):
+        created = CustomUser.objects.create_user('ben', 'pw', usertype='User', email='ben@example.com')
+        self.user = CustomUser.objects.get(pk=created.pk)
+
+    def test_plain_save_is_one_update(self):
+        self.user.firstname = 'Ben'
+        with self.assertNumQueries(1):
+            self.user.save()
+
+    def test_usertype_change_swaps_role_rows(self):
+        self.user.usertype = 'TeamLeader'
+        # The UPDATE, then per role model: delete Admin, get_or_create
+        # TeamLeader (select, savepoint, insert, release), delete User
+        with self.assertNumQueries(7):
+            self.user.save()
+        self.assertFalse(User.objects.filter(user=self.user).exists())
+        self.assertTrue(TeamLeader.objects.filter(user=self.user).exists())
+
+
+def create_user(username, usertype, team=None, subteam=None):
+    return CustomUser.objects.create_user(
+        username, 'pw', usertype=usertype, email=f'{username}@example.com', team=team, subteam=subteam,
+        # No chat_id, so no test sends a Telegram message
+        chat_id='',
+    )
+
+
+def login(username):
+    client = Client(secure=True)
+    response = client.post('/api/login/', {'username': username, 'password': 'pw'}, content_type='application/json')
+    assert response.status_code == 200, response.content
+    return client
+
+
+def create_projects(admin, count):
+    """`count` projects, each with its own team: a leader, an account manager and two members."""
+    for i in range(count):
+        project = Project.objects.create(
+            name=f'project {i}', description='d', status='Ongoing',
+            start_date='2025-01-01', deadline='2025-03-01', created_by=admin,
+        )
+        team = Team.objects.create(name=f'team {i}', description='d', team='Search', subteam='SEO', created_by=admin)
+        TeamRole.objects.create(team=team, user=create_user(f'leader{i}', 'TeamLeader', 'Search'), discipline='Search')
+        team.account_managers.add(admin)
+        team.members.add(*(create_user(f'member{i}_{n}', 'User', 'Search', 'SEO') for n in range(2)))
+        team.projects.add(project)
+
+
+class ProjectFetchQueryTests(TestCase):
+    # Same count at both sizes: relations are prefetched, never loaded per row
+    PROJECTS_QUERIES = 5
+    ASSIGNED_PROJECTS_QUERIES = 5
+
+    def setUp(self):
+        shared_cache.clear()
+        self.admin = create_user('admin', 'Admin')
+        self.client = login('admin')
+
+    def assert_fetch_queries(self, project_count):
+        create_projects(self.admin, project_count)
+        bump_version(MEMBERSHIP_GRAPH_VERSION)
+        get_membership_graph()
+        with self.assertNumQueries(self.PROJECTS_QUERIES):
+            response = self.client.get('/api/projects/')
+        self.assertEqual(len(response.json()['projects']), project_count)
+        with self.assertNumQueries(self.ASSIGNED_PROJECTS_QUERIES):
+            response = self.client.get('/api/projects/assigned/')
+        self.assertEqual(len(response.json()['projects']), project_count)
+
+    def test_few_projects(self):
+        self.assert_fetch_queries(2)
+
+    def test_many_projects(self):
+        self.assert_fetch_queries(12)
+
+
+class TaskFetchQueryTests(TestCase):
+    def setUp(self):
+        shared_cache.clear()
+        self.admin = create_user('admin', 'Admin')
+        self.superadmin = create_user('boss', 'SuperAdmin')
+        self.leader = create_user('leader', 'TeamLeader', 'Search')
+        self.project = Project.objects.create(
+            name='project', description='d', status='Ongoing',
+            start_date='2025-01-01', deadline='2025-03-01', created_by=self.admin,
+        )
+        self.client = login('admin')
+
+    def create_tasks(self, count):
+        # Half created by the admin for a leader, half assigned to the admin
+        for i in range(count):
+            created_by, assignee = (self.admin, self.leader) if i % 2 else (self.superadmin, self.admin)
+            task = Task(
+                project=self.project, title=f'task {i}', description='d',
+                start_date='2025-01-01', end_date='2025-01-31', created_by=created_by,
+            )
+            task.assign_task(created_by, assignee)
+
+    def assert_one_query(self, task_count):
+        self.create_tasks(task_count)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/tasks/')
+        data = response.json()
+        self.assertEqual(len(data['created_tasks']) + len(data['assigned_tasks']), task_count)
+
+    def test_few_tasks(self):
+        self.assert_one_query(2)
+
+    def test_many_tasks(self):
+        self.assert_one_query(30)
+
+
+class TaskAssignmentTests(TestCase):
+    def setUp(self):
+        shared_cache.clear()
+        self.superadmin = create_user('boss', 'SuperAdmin')
+        self.admin = create_user('admin', 'Admin')
+        self.leader = create_user('leader', 'TeamLeader', 'Search')
+        self.project = Project.objects.create(
+            name='project', description='d', status='Ongoing',
+            start_date='2025-01-01', deadline='2025-03-01', created_by=self.admin,
+        )
+        self.task = Task.objects.create(
+            project=self.project, title='task', description='d',
+            start_date='2025-01-01', end_date='2025-01-31', created_by=self.superadmin,
+        )
+
+    def assign(self, username, assignee):
+        return login(username).post(f'/api/tasks/{self.task.id}/assign/', {'assigned_to': assignee.id}, content_type='application/json')
+
+    def test_superadmin_assigns_admin_as_bulk_assign_does(self):
+        self.assertEqual(self.assign('boss', self.admin).status_code, 200)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.superadmin_assigned_to_id, self.admin.id)
+
+    def test_assignment_rules_apply(self):
+        response = self.assign('admin', self.admin)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['message'], Task.assignment_error('Admin', 'Admin'))
+        self.assertEqual(self.assign('admin', self.leader).status_code, 200)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.admin_assigned_to_id, self.leader.id)
+
+    def test_bulk_create_reports_ids_without_returning(self):
+        rows = [
+            {'title': f'bulk {i}', 'project': self.project.id, 'start_date': '2025-03-01', 'end_date': '2025-03-15'}
+            for i in range(3)
+        ]
+        client = login('admin')
+        # As on MySQL, where bulk_create cannot read back the new pks
+        returning = mock.PropertyMock(return_value=False)
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', returning):
+            response = client.post('/api/tasks/bulk-create/', {'tasks': rows}, content_type='application/json')
+        created = response.json()['created']
+        self.assertEqual(len(created), 3)
+        self.assertEqual(
+            sorted(task['id'] for task in created),
+            sorted(Task.objects.filter(title__startswith='bulk').values_list('id', flat=True)),
+        )
+
+
+class TimesheetTaskLinkTests(TestCase):
+    def setUp(self):
+        shared_cache.clear()
+        admin = create_user('admin', 'Admin')
+        self.leader = create_user('leader', 'TeamLeader', 'Search')
+        self.user = create_user('member', 'User', 'Search', 'SEO')
+        self.projects = [
+            Project.objects.create(
+                name=f'project {i}', description='d', status='Ongoing',
+                start_date='2025-01-01', deadline='2025-03-01', created_by=admin,
+            )
+            for i in range(2)
+        ]
+        self.tasks = [
+            Task.objects.create(
+                project=project, title='Landing page', description='d',
+                start_date='2025-01-01', end_date='2025-01-31', created_by=admin,
+            )
+            for project in self.projects
+        ]
+        self.timesheet = Timesheet.objects.create(
+            date='2025-01-10', task='landing page', submitted_to=self.leader, description='d',
+            hours=2, created_by=self.user, project=self.projects[0], linked_task=self.tasks[0],
+        )
+        self.table = TimesheetTable.objects.create(created_by=self.user)
+        self.table.timesheets.add(self.timesheet)
+        self.client = login('member')
+
+    def edit(self, **changes):
+        row = {
+            'id': self.timesheet.id, 'date': '2025-01-10', 'task': 'landing page', 'status': 'To Do',
+            'description': 'd', 'hours': '2', 'submitted_to': 'leader', 'created_by': 'member',
+            'project_id': self.projects[0].id, 'linked_task': self.tasks[0].id,
+        }
+        row.update(changes)
+        return self.client.put(f'/api/timesheet-tables/{self.table.id}/edit/', {'timesheets': [row]}, content_type='application/json')
+
+    def test_link_to_another_projects_task_is_rejected(self):
+        self.assertEqual(self.edit(linked_task=self.tasks[1].id).status_code, 400)
+        self.timesheet.refresh_from_db()
+        self.assertEqual(self.timesheet.linked_task_id, self.tasks[0].id)
+        self.assertEqual(self.table.timesheets.count(), 1)
+
+    def test_link_to_missing_task_is_rejected(self):
+        self.assertEqual(self.edit(linked_task=999999).status_code, 400)
+
+    def test_moving_project_matches_the_link_again(self):
+        self.assertEqual(self.edit(project_id=self.projects[1].id).status_code, 200)
+        self.timesheet.refresh_from_db()
+        self.assertEqual(self.timesheet.linked_task_id, self.tasks[1].id)
+
+
+class UserSearchTests(TestCase):
+    def setUp(self):
+        create_user('boss', 'SuperAdmin')
+        create_user('rahul', 'User', 'Search', 'SEO')
+        self.client = login('boss')
+
+    def search(self, q):
+        return self.client.get('/api/users/search/', {'q': q, 'scope': 'all'})
+
+    def test_prefix_range(self):
+        self.assertEqual(prefix_range('ra'), ('ra', 'rb'))
+        self.assertEqual(prefix_range('a\U0010ffff'), ('a\U0010ffff', 'b'))
+        self.assertEqual(prefix_range('\U0010ffff'), ('\U0010ffff', None))
+        self.assertEqual(prefix_range('\ud7ff'), ('\ud7ff', '\ue000'))
+
+    def test_prefix_match(self):
+        response = self.search('RAH')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([user['username'] for user in response.json()['users']], ['rahul'])
+
+    def test_non_ascii_prefix_ignores_case(self):
+        create_user('Émile', 'User', 'Search', 'SEO')
+        for q in ('É', 'é', 'Ém', 'ÉMILE', 'e\u0301m'):
+            response = self.search(q)
+            self.assertEqual([user['username'] for user in response.json()['users']], ['Émile'], q)
+
+    def test_search_keys_follow_saves(self):
+        user = create_user('zoe', 'User', 'Search', 'SEO')
+        user = CustomUser.objects.only('id', 'lastname').get(pk=user.pk)
+        user.lastname = 'Ørsted'
+        user.save(update_fields=['lastname'])
+        self.assertEqual([row['username'] for row in self.search('øRS').json()['users']], ['zoe'])
+        import_users([{
+            'firstname': 'Ørjan', 'email': 'orjan@example.com', 'password': 'pw', 'usertype': 'User',
+        }], notify=False)
+        self.assertEqual([row['username'] for row in self.search('ørj').json()['users']], ['Ørjan'])
+
+    def test_prefix_ending_in_last_code_point(self):
+        for q in ('\U0010ffff', 'r\U0010ffff', '\ud7ff'):
+            response = self.search(q)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['users'], [])
+
+class ReissueAccessTokenTests(TestCase):
+    def setUp(self):
+        shared_cache.clear()
+        token_cache.clear()
+        user_cache.clear()
+        user = create_user('cara', 'User', 'Search')
+        self.token = str(RoleAccessToken.for_user(user))
+        user.usertype = 'TeamLeader'
+        user.save()
+
+    def test_header_client_gets_token_in_header(self):
+        response = Client(secure=True).get('/api/auth-check/', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(AccessToken(response[ACCESS_TOKEN_HEADER])['usertype'], 'TeamLeader')
+        self.assertNotIn('access_token', response.cookies)
+
+    def test_cookie_client_gets_token_in_cookie(self):
+        client = Client(secure=True)
+        client.cookies['access_token'] = self.token
+        response = client.get('/api/auth-check/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(AccessToken(response.cookies['access_token'].value)['usertype'], 'TeamLeader')
+        self.assertNotIn(ACCESS_TOKEN_HEADER, response)
+
+
+class RefreshTokenTests(TestCase):
+    def setUp(self):
+        create_user('dev', 'User', 'Search')
+        self.client = login('dev')
+        self.refresh_token = self.client.cookies['refresh_token'].value
+
+    def refresh(self, refresh_token):
+        client = Client(secure=True)
+        client.cookies['refresh_token'] = refresh_token
+        return client.post('/api/token/refresh/')
+
+    def test_rotated_refresh_token_is_rejected(self):
+        response = self.refresh(self.refresh_token)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.cookies['refresh_token'].value, self.refresh_token)
+        self.assertEqual(self.refresh(self.refresh_token).status_code, 401)
+        self.assertEqual(self.refresh(response.cookies['refresh_token'].value).status_code, 200)
+
+    def test_logout_revokes_refresh_token(self):
+        self.assertEqual(self.client.post('/api/token/logout/').status_code, 200)
+        self.assertEqual(self.refresh(self.refresh_token).status_code, 401)
+
+
+class UserImportTests(TestCase):
+    def setUp(self):
+        create_user('taken', 'User')
+
+    def row(self, username, usertype='User', **fields):
+        return {
+            'firstname': username, 'username': username, 'email': f'{username}@import.example.com',
+            'password': 'pw', 'usertype': usertype, 'team': 'Search', **fields,
+        }
+
+    def test_duplicate_and_conflicting_rows_are_skipped(self):
+        result = import_users([
+            self.row('ana'),
+            self.row('ana', email='other@import.example.com'),
+            self.row('bea', email='ana@import.example.com'),
+            self.row('taken'),
+            self.row('cai', email='taken@example.com'),
+            self.row('dan', usertype='Boss'),
+        ], notify=False)
+        self.assertEqual([user['username'] for user in result['created']], ['ana'])
+        self.assertEqual([error['row'] for error in result['errors']], [2, 3, 4, 5, 6])
+
+    def test_role_rows_are_created(self):
+        result = import_users([self.row('eve', 'Admin'), self.row('fay', 'TeamLeader'), self.row('gus')], notify=False)
+        ids = {user['username']: user['id'] for user in result['created']}
+        self.assertTrue(Admin.objects.filter(user_id=ids['eve']).exists())
+        self.assertTrue(TeamLeader.objects.filter(user_id=ids['fay']).exists())
+        self.assertTrue(User.objects.filter(user_id=ids['gus']).exists())
+        self.assertTrue(CustomUser.objects.get(id=ids['gus']).check_password('pw'))
+
+    def test_ids_are_read_back_without_returning(self):
+        # As on MySQL, where bulk_create cannot read back the new pks
+        returning = mock.PropertyMock(return_value=False)
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', returning):
+            result = import_users([self.row('hal'), self.row('ida', 'TeamLeader')], notify=False)
+        self.assertEqual(
+            {user['username']: user['id'] for user in result['created']},
+            dict(CustomUser.objects.filter(username__in=['hal', 'ida']).values_list('username', 'id')),
+        )
+        self.assertTrue(TeamLeader.objects.filter(user__username='ida').exists())
+
+    def test_admin_cannot_import_superadmins(self):
+        create_user('admin', 'Admin')
+        rows = [self.row('root', 'SuperAdmin'), self.row('peer', 'Admin')]
+        response = login('admin').post('/api/users/import/', {'users': rows}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.json()['errors']), 2)
+        self.assertFalse(CustomUser.objects.filter(username__in=['root', 'peer']).exists())
+
+    def test_request_row_cap(self):
+        create_user('boss', 'SuperAdmin')
+        rows = [self.row(f'u{i}') for i in range(IMPORT_REQUEST_MAX_ROWS + 1)]
+        response = login('boss').post('/api/users/import/', {'users': rows}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(CustomUser.objects.filter(username='u0').exists())
+
+
+class DashboardInvalidationTests(TestCase):
+    def setUp(self):
+        admin = create_user('admin', 'Admin')
+        create_projects(admin, 2)
+        self.projects = list(Project.objects.order_by('id'))
+        self.user = create_user('member', 'User', 'Search', 'SEO')
+
+    def create_timesheets(self, count):
+        return [
+            Timesheet.objects.create(
+                date='2025-01-10', task='t', submitted_to=self.user, description='d',
+                hours=1, created_by=self.user, project=self.projects[0],
+            )
+            for _ in range(count)
+        ]
+
+    def test_bumped_once_per_project_after_commit(self):
+        with mock.patch('timesheet_app.dashboards.bump_version') as bump:
+            with self.captureOnCommitCallbacks(execute=True):
+                timesheets = self.create_timesheets(3)
+                timesheets[0].project = self.projects[1]
+                timesheets[0].save()
+                bump.assert_not_called()
+        self.assertCountEqual(
+            [call.args[0] for call in bump.call_args_list],
+            [dashboard_version_name(project.id) for project in self.projects],
+        )
+
+    def test_chunk_delete_bumps_once(self):
+        # Committed, as DeletionJob chunks delete in their own transactions
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_timesheets(3)
+        with mock.patch('timesheet_app.dashboards.bump_version') as bump:
+            with self.captureOnCommitCallbacks(execute=True):
+                Timesheet.objects.filter(project=self.projects[0]).delete()
+        bump.assert_called_once_with(dashboard_version_name(self.projects[0].id))
+
+
+class DeletionJobTests(TestCase):
+    def setUp(self):
+        self.admin = create_user('admin', 'Admin')
+        create_projects(self.admin, 2)
+        self.project, self.other_project = Project.objects.order_by('id')
+        self.user = create_user('member', 'User', 'Search', 'SEO')
+        for project in (self.project, self.other_project):
+            task = Task.objects.create(
+                project=project, title='Landing page', description='d',
+                start_date='2025-01-01', end_date='2025-01-31', created_by=self.admin,
+            )
+            timesheet = Timesheet.objects.create(
+                date='2025-01-10', task='Landing page', submitted_to=self.admin, description='d',
+                hours=2, created_by=self.user, project=project, linked_task=task,
+            )
+            TimesheetTable.objects.create(created_by=self.user).timesheets.add(timesheet)
+
+    def schedule(self, instance):
+        with mock.patch('timesheet_app.deletions.queue_deletion_job') as queue:
+            with self.captureOnCommitCallbacks(execute=True):
+                job = schedule_deletion(instance, requested_by=self.admin)
+        queue.assert_called_once_with(job.pk)
+        return job
+
+    def test_schedule_deletion_hides_at_once(self):
+        job = self.schedule(self.project)
+        self.assertEqual(job.status, DeletionJob.PENDING)
+        self.assertFalse(Project.objects.filter(pk=self.project.pk).exists())
+        self.assertTrue(Project.all_objects.filter(pk=self.project.pk, is_hidden=True).exists())
+
+    def test_run_deletion_job_deletes_the_cascade(self):
+        job = run_deletion_job(self.schedule(self.project).pk)
+        self.assertEqual(job.status, DeletionJob.COMPLETED)
+        self.assertEqual(job.deleted_rows, job.total_rows)
+        self.assertFalse(Project.all_objects.filter(pk=self.project.pk).exists())
+        self.assertFalse(Task.objects.filter(project_id=self.project.pk).exists())
+        self.assertFalse(Timesheet.objects.filter(project_id=self.project.pk).exists())
+        self.assertFalse(ProjectMembership.objects.filter(project_id=self.project.pk).exists())
+        self.assertEqual(Task.objects.filter(project=self.other_project).count(), 1)
+        self.assertEqual(Timesheet.objects.filter(project=self.other_project).count(), 1)
+
+    def test_failed_job_resumes_from_its_step(self):
+        job = self.schedule(self.project)
+        with mock.patch('timesheet_app.deletions.delete_in_chunks', side_effect=[None, RuntimeError('lock timeout')]):
+            with self.assertLogs('timesheet_app.deletions', 'ERROR'):
+                job = run_deletion_job(job.pk)
+        self.assertEqual((job.status, job.step, job.error), (DeletionJob.FAILED, 1, 'lock timeout'))
+
+        with mock.patch('timesheet_app.deletions.delete_in_chunks', wraps=delete_in_chunks) as chunks:
+            job = run_deletion_job(job.pk)
+        self.assertEqual(job.status, DeletionJob.COMPLETED)
+        # Step 0 (the timesheets) is not run again
+        self.assertEqual(
+            [call.args[1].model for call in chunks.call_args_list],
+            [Task, ProjectMembership, Team.projects.through, Project],
+        )
+        self.assertFalse(Project.all_objects.filter(pk=self.project.pk).exists())
+
+    def test_hidden_project_tasks_leave_the_board(self):
+        task = Task.objects.get(project=self.project)
+        client = login('admin')
+        with mock.patch('timesheet_app.deletions.queue_deletion_job'):
+            self.assertEqual(client.delete(f'/api/projects/{self.project.pk}/delete/').status_code, 202)
+        self.assertEqual(
+            [row['id'] for row in client.get('/api/tasks/').json()['created_tasks']],
+            [Task.objects.get(project=self.other_project).id],
+        )
+        self.assertEqual(client.get('/api/tasks/counts/').json()['counts']['total'], 1)
+        self.assertEqual(client.get(f'/api/tasks/{task.id}/hours/').status_code, 404)
+
+    def test_hidden_table_timesheets_are_left_out(self):
+        table = TimesheetTable.objects.get(timesheets__project=self.project)
+        self.schedule(table)
+        client = login('member')
+        self.assertEqual(
+            [row['id'] for row in client.get('/api/timesheet-tables/timesheets/').json()['timesheets']],
+            [Timesheet.objects.get(project=self.other_project).id],
+        )
+        self.assertEqual(build_task_hours(Task.objects.get(project=self.project).id)['total_hours'], 0)
+
+
+class TeamFetchQueryTests(TestCase):
+    # Same count at both sizes: the member count is a subquery and relations
+    # are prefetched, never loaded per team
+    TEAMS_QUERIES = 5
+
+    def setUp(self):
+        shared_cache.clear()
+        self.admin = create_user('admin', 'Admin')
+        self.client = login('admin')
+
+    def assert_fetch_queries(self, team_count):
+        create_projects(self.admin, team_count)
+        bump_version(MEMBERSHIP_GRAPH_VERSION)
+        get_membership_graph()
+        with self.assertNumQueries(self.TEAMS_QUERIES):
+            response = self.client.get('/api/teams/')
+        self.assertEqual(len(response.json()['teams']), team_count)
+
+    def test_few_teams(self):
+        self.assert_fetch_queries(2)
+
+    def test_many_teams(self):
+        self.assert_fetch_queries(12)
+
+    def test_total_members_counts_each_user_once(self):
+        create_projects(self.admin, 1)
+        team = Team.objects.get()
+        # The account manager and leader are also members: still one each
+        team.members.add(self.admin, TeamRole.objects.get(team=team).user)
+        bump_version(MEMBERSHIP_GRAPH_VERSION)
+        response = self.client.get('/api/teams/', {'fields': 'id,total_members'})
+        # A leader, an account manager and two members
+        self.assertEqual(response.json()['teams'], [{'id': team.id, 'total_members': 4}])
+
+
+class TeamEditQueryTests(TestCase):
+    # Same count at both sizes: membership changes are bulk writes
+    EDIT_TEAM_QUERIES = 23
+
+    def setUp(self):
+        shared_cache.clear()
+        self.admin = create_user('boss', 'SuperAdmin')
+        create_projects(self.admin, 1)
+        self.team = Team.objects.get()
+        self.client = login('boss')
+
+    def assert_edit_queries(self, member_count):
+        old_members = [create_user(f'old{n}', 'User', 'Search', 'SEO') for n in range(member_count)]
+        new_members = [create_user(f'new{n}', 'User', 'Search', 'SEO') for n in range(member_count)]
+        self.team.members.set(old_members)
+        leader = create_user('new_leader', 'TeamLeader', 'Search')
+        payload = {
+            'name': 'renamed', 'account_manager_ids': [self.admin.id],
+            'member_ids': [user.id for user in new_members], 'team_leader_search': leader.id,
+        }
+        with self.assertNumQueries(self.EDIT_TEAM_QUERIES):
+            response = self.client.put(f'/api/teams/{self.team.id}/edit/', payload, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertCountEqual(self.team.members.values_list('id', flat=True), [user.id for user in new_members])
+        self.assertEqual(TeamRole.objects.get(team=self.team, discipline='Search').user_id, leader.id)
+
+    def test_small_team(self):
+        self.assert_edit_queries(3)
+
+    def test_large_team(self):
+        self.assert_edit_queries(20)
+
+
+class ReminderTests(TestCase):
+    def setUp(self):
+        self.admin = create_user('admin', 'Admin')
+        self.leader = create_user('leader', 'TeamLeader', 'Search')
+        self.user = create_user('member', 'User', 'Search', 'SEO')
+        CustomUser.objects.update(chat_id=F('username'), date_joined=datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc))
+
+    def remind(self, command, *args):
+        with mock.patch('timesheet_app.reminders.queue_telegram_message') as queue:
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command(command, *args, stdout=io.StringIO())
+        return {chat_id: message for chat_id, message in (call.args for call in queue.call_args_list)}
+
+    def test_overdue_tasks(self):
+        project = Project.objects.create(
+            name='project', description='d', status='Ongoing',
+            start_date='2025-01-01', deadline='2025-03-01', created_by=self.admin,
+        )
+        Task.objects.create(
+            project=project, title='Landing page', description='d', start_date='2025-01-01',
+            end_date='2025-01-31', created_by=self.admin, admin_assigned_to=self.leader,
+        )
+        Task.objects.create(
+            project=project, title='Done already', description='d', start_date='2025-01-01',
+            end_date='2025-01-31', created_by=self.admin, admin_assigned_to=self.leader, status='Completed',
+        )
+        messages = self.remind('remind_overdue_tasks', '--date', '2025-02-03')
+        self.assertEqual(set(messages), {'leader', 'admin'})
+        self.assertIn(OVERDUE_TASKS_HEADING, messages['leader'])
+        self.assertIn(ASSIGNED_OVERDUE_TASKS_HEADING, messages['admin'])
+        self.assertNotIn('Done already', messages['leader'])
+        # A rerun sends nothing new
+        self.assertEqual(self.remind('remind_overdue_tasks', '--date', '2025-02-03'), {})
+
+    def test_missing_timesheets(self):
+        Timesheet.objects.create(
+            date='2025-02-04', task='t', submitted_to=self.leader, description='d',
+            hours=1, created_by=self.user,
+        )
+        # Monday 3rd to Wednesday 5th February
+        messages = self.remind('remind_missing_timesheets', '--date', '2025-02-06', '--days', '3')
+        self.assertEqual(set(messages), {'member', 'leader'})
+        self.assertIn('2025-02-03', messages['member'])
+        self.assertNotIn('2025-02-04', messages['member'])
+        self.assertIn(TEAM_MISSING_TIMESHEETS_HEADING, messages['leader'])
+        self.assertIn('<b>member</b>, Wed 2025-02-05', messages['leader'])
+        self.assertEqual(self.remind('remind_missing_timesheets', '--date', '2025-02-06', '--days', '3'), {})
+
+    def test_missing_timesheets_over_many_days(self):
+        days = previous_workdays(datetime.date(2027, 1, 1), 501)
+        self.assertEqual(len(missing_timesheets(days)), 2 * 501)
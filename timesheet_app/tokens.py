@@ -0,0 +1,56 @@
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken # type: ignore
+
+# User fields signed into every token so permission and scope checks can
+# run without loading the user row (see CustomUser.from_token_claims)
+CLAIM_FIELDS = ('username', 'usertype', 'team', 'subteam')
+
+# The refresh token cookie is only ever sent to the refresh and logout
+# endpoints under /api/token/
+REFRESH_TOKEN_COOKIE_PATH = '/api/token/'
+
+
+def add_role_claims(token, user):
+    for claim in CLAIM_FIELDS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+def has_role_claims(validated_token):
+    return all(claim in validated_token for claim in CLAIM_FIELDS)
+
+
+class RoleRefreshToken(RefreshToken):
+    @classmethod
+    def for_user(cls, user):
+        return add_role_claims(super().for_user(user), user)
+
+
+class RoleAccessToken(AccessToken):
+    @classmethod
+    def for_user(cls, user):
+        return add_role_claims(super().for_user(user), user)
+
+
+def set_access_token_cookie(response, access_token):
+    response.set_cookie(
+        key="access_token",
+        value=str(access_token),
+        httponly=True,
+        secure=True,
+        samesite="None",
+        max_age=int(access_token.lifetime.total_seconds()),
+    )
+    return response
+
+
+def set_refresh_token_cookie(response, refresh_token):
+    response.set_cookie(
+        key="refresh_token",
+        value=str(refresh_token),
+        httponly=True,
+        secure=True,
+        samesite="None",
+        path=REFRESH_TOKEN_COOKIE_PATH,
+        max_age=int(refresh_token.lifetime.total_seconds()),
+    )
+    return response
@@ -6,5 +6,6 @@ urlpatterns = [
     path('tasks/', include('timesheet_app.urls.task_urls')),
     path('', include('timesheet_app.urls.user_urls')),
     path('timesheet-tables/', include('timesheet_app.urls.timesheet_urls')),
+    path('deletion-jobs/', include('timesheet_app.urls.deletion_urls')),
     path('',include('timesheet_app.urls.message_url'))
 ]
@@ -1,14 +1,19 @@
 from django.urls import path
 from timesheet_app.views.auth_views import (
-    CustomTokenObtainPairView, LogoutView, AuthCheckView,
-    RequestPasswordResetCodeView, ChangePasswordView, RegisterUserView
+    CustomTokenObtainPairView, CookieTokenRefreshView, LogoutView, AuthCheckView,
+    RequestPasswordResetCodeView, ChangePasswordView, RegisterUserView,
+    ImportUsersView
 )
 
 urlpatterns = [
     path('login/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('token/refresh/', CookieTokenRefreshView.as_view(), name='token_refresh'),
     path('logout/', LogoutView.as_view(), name='logout'),
+    # Receives the refresh token cookie, so logging out here also revokes it
+    path('token/logout/', LogoutView.as_view(), name='token_logout'),
     path('auth-check/', AuthCheckView.as_view(), name='auth-check'),
     path('register/', RegisterUserView.as_view(), name='register_user'),
+    path('users/import/', ImportUsersView.as_view(), name='import_users'),
     path('request-password-reset-code/', RequestPasswordResetCodeView.as_view(), name='request_password_reset_code'),
     path('change-password/', ChangePasswordView.as_view(), name='change_password'),
 ]
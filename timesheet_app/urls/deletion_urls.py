@@ -0,0 +1,6 @@
+from django.urls import path
+from timesheet_app.views.deletion_views import DeletionJobStatusView
+
+urlpatterns = [
+    path('<int:job_id>/', DeletionJobStatusView.as_view(), name='deletion_job_status'),
+]
@@ -1,7 +1,8 @@
 from django.urls import path
 from timesheet_app.views.project_views import (
     CreateProjectView, FetchProjectsView, FetchAssignedProjectsView,
-    EditProjectView, DeleteProjectView,FetchProjectTeamLeadersView
+    EditProjectView, DeleteProjectView,FetchProjectTeamLeadersView,
+    ProjectDashboardView
     
 )
 
@@ -11,5 +12,6 @@ urlpatterns = [
     path('assigned/', FetchAssignedProjectsView.as_view(), name='fetch_assigned_projects'),
     path('<int:project_id>/edit/', EditProjectView.as_view(), name='edit_project'),
     path('<int:project_id>/delete/', DeleteProjectView.as_view(), name='delete_project'),
+    path('<int:project_id>/dashboard/', ProjectDashboardView.as_view(), name='project_dashboard'),
     path('<int:project_id>/team-leaders/', FetchProjectTeamLeadersView.as_view(), name='fetch_project_team_leaders'),
 ]
@@ -1,13 +1,18 @@
 from django.urls import path
 from timesheet_app.views.task_views import (
-    CreateTaskView, FetchTasksView,
-    EditTaskView, DeleteTaskView,AssignTaskView
+    CreateTaskView, FetchTasksView, FetchTaskCountsView,
+    EditTaskView, DeleteTaskView,AssignTaskView,
+    BulkCreateTasksView, BulkAssignTasksView, TaskHoursView
 )
 
 urlpatterns = [
     path('create/', CreateTaskView.as_view(), name='create_task'),
     path('', FetchTasksView.as_view(), name='fetch_tasks'), 
+    path('counts/', FetchTaskCountsView.as_view(), name='fetch_task_counts'),
+    path('bulk-create/', BulkCreateTasksView.as_view(), name='bulk_create_tasks'),
+    path('bulk-assign/', BulkAssignTasksView.as_view(), name='bulk_assign_tasks'),
     path('<int:task_id>/edit/', EditTaskView.as_view(), name='edit_task'),
     path('<int:task_id>/delete/', DeleteTaskView.as_view(), name='delete_task'),
     path('<int:task_id>/assign/', AssignTaskView.as_view(), name='assign_task'),
+    path('<int:task_id>/hours/', TaskHoursView.as_view(), name='task_hours'),
 ]
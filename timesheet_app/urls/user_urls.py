@@ -1,11 +1,14 @@
 from django.urls import path
 from timesheet_app.views.user_views import (
-    FetchUserDetailsView, UpdateProfileView, FetchUsersView, FetchTeamLeadersView,FetchWorkingHoursView,FetchAllUsers
+    FetchUserDetailsView, UpdateProfileView, FetchUsersView, FetchTeamLeadersView,FetchWorkingHoursView,FetchAllUsers,
+    SearchUsersView, FetchUserChoicesView
 )
 urlpatterns = [
     path('users/<int:user_id>/', FetchUserDetailsView.as_view(), name='fetch_user_details'),
     path('update-profile/<int:user_id>/', UpdateProfileView.as_view(), name='update_profile'), 
     path('users/', FetchUsersView.as_view(), name='fetch_users'),
+    path('users/search/', SearchUsersView.as_view(), name='search_users'),
+    path('users/choices/', FetchUserChoicesView.as_view(), name='fetch_user_choices'),
     path('teams/<int:team_id>/leaders/', FetchTeamLeadersView.as_view(), name='fetch_team_leaders'), 
     path('teams/leaders/', FetchTeamLeadersView.as_view(), name='fetch_team_leaders'), 
     path('working-hours/', FetchWorkingHoursView.as_view(), name='fetch_working_hours'),
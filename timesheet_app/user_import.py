@@ -0,0 +1,180 @@
+import csv
+import io
+import json
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Q
+
+from timesheet_app.membership_graph import invalidate_membership_graph
+from timesheet_app.reference_data import invalidate_reference_data
+from timesheet_app.models import CustomUser, ROLE_MODELS
+from timesheet_app.utils import queue_telegram_message
+
+USERTYPES = {choice for choice, _ in CustomUser.USERTYPE_CHOICES}
+TEAMS = {choice for choice, _ in CustomUser.TEAM_CHOICES}
+SUBTEAMS = {choice for choice, _ in CustomUser.SUBTEAM_CHOICES}
+
+# Usertypes each usertype may import over the API: only levels below its own
+IMPORTABLE_USERTYPES = {
+    'SuperAdmin': ('Admin', 'TeamLeader', 'User'),
+    'Admin': ('TeamLeader', 'User'),
+}
+
+# Below this many passwords a process pool costs more than it saves
+POOL_THRESHOLD = 20
+# Rows per API import. Each password hash takes about 0.3 s, so larger imports
+# would outlive the request timeout and must use `manage.py import_users`
+IMPORT_REQUEST_MAX_ROWS = getattr(settings, "IMPORT_REQUEST_MAX_ROWS", 50)
+
+
+def parse_user_rows(content, file_format):
+    """Parse a CSV (with a header row) or JSON (a list of objects) import file."""
+    if isinstance(content, bytes):
+        content = content.decode('utf-8-sig')
+    if file_format == 'json':
+        rows = json.loads(content)
+        if not isinstance(rows, list):
+            raise ValueError("JSON import must be a list of user objects")
+        return rows
+    if file_format == 'csv':
+        return list(csv.DictReader(io.StringIO(content)))
+    raise ValueError(f"Unsupported import format: {file_format}")
+
+
+def _init_hash_worker():
+    # Spawned workers start from a fresh interpreter
+    if not apps.ready:
+        django.setup()
+
+
+def hash_passwords(passwords):
+    if len(passwords) < POOL_THRESHOLD:
+        return [make_password(password) for password in passwords]
+    workers = min(len(passwords), os.cpu_count() or 1)
+    # Spawned, never forked: a web worker already runs the Telegram and deletion
+    # executor threads, and a forked child can deadlock on a lock one of them held
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_hash_worker) as pool:
+        return list(pool.map(make_password, passwords, chunksize=max(1, len(passwords) // (workers * 4))))
+
+
+def clean_row(row, usertypes=USERTYPES):
+    """
+    Return (user fields, error) for one import row, mirroring RegisterUserView.
+    Rows for usertypes outside `usertypes` are errors.
+    """
+    data = {key: (value.strip() if isinstance(value, str) else value) for key, value in row.items() if key}
+    firstname = data.get('firstname')
+    email = data.get('email')
+    password = data.get('password')
+    usertype = data.get('usertype')
+    team = data.get('team') or None
+    subteam = data.get('subteam') or None
+
+    if not firstname or not email or not password:
+        return None, "firstname, email and password are required"
+    if usertype not in USERTYPES:
+        return None, f"Invalid usertype: {usertype}"
+    if usertype not in usertypes:
+        return None, f"Not allowed to import usertype: {usertype}"
+    if team and team not in TEAMS:
+        return None, f"Invalid team: {team}"
+    if subteam and subteam not in SUBTEAMS:
+        return None, f"Invalid subteam: {subteam}"
+
+    fields = {
+        'usertype': usertype,
+        'firstname': firstname,
+        'email': email,
+        'team': team,
+        'subteam': subteam,
+        'username': data.get('username') or firstname,
+        'password': password,
+    }
+    # Optional columns fall back to the model defaults
+    for optional in ('lastname', 'chat_id'):
+        if data.get(optional):
+            fields[optional] = str(data[optional])
+    return fields, None
+
+
+def import_users(rows, notify=True, usertypes=USERTYPES):
+    """
+    Create users in bulk: one conflict query, passwords hashed in a process pool,
+    users and their role rows bulk-inserted, welcome messages queued. Only
+    rows of `usertypes` are imported.
+    """
+    errors = []
+    candidates = []
+    seen_emails, seen_usernames = set(), set()
+    for index, row in enumerate(rows, start=1):
+        fields, error = clean_row(row, usertypes)
+        if not error and fields['email'] in seen_emails:
+            error = "Email is duplicated in the import"
+        if not error and fields['username'] in seen_usernames:
+            error = "Username is duplicated in the import"
+        if error:
+            errors.append({"row": index, "error": error})
+            continue
+        seen_emails.add(fields['email'])
+        seen_usernames.add(fields['username'])
+        candidates.append((index, fields))
+
+    taken_emails, taken_usernames = set(), set()
+    for email, username in CustomUser.objects.filter(
+        Q(email__in=seen_emails) | Q(username__in=seen_usernames)
+    ).values_list('email', 'username'):
+        taken_emails.add(email)
+        taken_usernames.add(username)
+
+    accepted = []
+    for index, fields in candidates:
+        if fields['email'] in taken_emails:
+            errors.append({"row": index, "error": "Email is already registered."})
+        elif fields['username'] in taken_usernames:
+            errors.append({"row": index, "error": "Username is already taken."})
+        else:
+            accepted.append(fields)
+
+    hashes = hash_passwords([fields['password'] for fields in accepted])
+    users = [
+        CustomUser(**{**fields, 'password': password_hash})
+        for fields, password_hash in zip(accepted, hashes)
+    ]
+    # bulk_create bypasses save()
+    for user in users:
+        user.set_search_keys()
+
+    with transaction.atomic():
+        CustomUser.objects.bulk_create(users, batch_size=500)
+        if users and users[0].pk is None:
+            # Backends without RETURNING (MySQL) leave pks unset
+            ids = dict(CustomUser.objects.filter(username__in=[user.username for user in users]).values_list('username', 'id'))
+            for user in users:
+                user.pk = ids[user.username]
+
+        for usertype, role_model in ROLE_MODELS.items():
+            role_model.objects.bulk_create(
+                [role_model(user=user) for user in users if user.usertype == usertype], batch_size=500
+            )
+        # bulk_create sends no post_save
+        if users:
+            invalidate_membership_graph()
+            invalidate_reference_data()
+
+    if notify:
+        for fields, user in zip(accepted, users):
+            message = f"Welcome to the Timesheet App! Your username is {user.username}, and your password is {fields['password']}. Please log in to the app and change your password immediately."
+            queue_telegram_message(user.chat_id, message)
+
+    return {
+        "created": [{"id": user.id, "username": user.username, "email": user.email} for user in users],
+        "errors": sorted(errors, key=lambda error: error["row"]),
+    }
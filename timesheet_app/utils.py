@@ -1,9 +1,13 @@
 import requests
 import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 def send_telegram_message(chat_id, message, file=None):
     bot_token = os.getenv("TELEGRAM_BOT_TOKEN")
     if not bot_token:
@@ -26,3 +30,51 @@ def send_telegram_message(chat_id, message, file=None):
         response = requests.post(url, data=payload)
 
     return response.json()
+
+
+# Notifications are sent from a single background thread so bulk operations
+# never block the request on the Telegram API
+_telegram_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="telegram")
+
+def _send_telegram_message_logged(chat_id, message):
+    try:
+        send_telegram_message(chat_id, message)
+    except Exception as e:
+        logger.error(f"Failed to send Telegram message to {chat_id}: {str(e)}")
+
+def queue_telegram_message(chat_id, message):
+    if chat_id:
+        _telegram_executor.submit(_send_telegram_message_logged, chat_id, message)
+
+
+# Sparse fieldsets: ?fields=id,name picks payload keys and ?expand=teams adds
+# nested relations. With neither parameter every key is rendered, so existing
+# clients keep the full payload; views only query what ends up selected.
+def split_param(value):
+    if value is None:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+def parse_fieldset(query_params, fields, expandable=()):
+    """
+    Return the set of payload keys to render. `fields` are the plain keys and
+    `expandable` the nested relations; `?expand=` without `?fields=` keeps
+    every plain key. Raises ValueError naming any unknown key.
+    """
+    requested = split_param(query_params.get('fields'))
+    expand = split_param(query_params.get('expand'))
+
+    if requested is None and expand is None:
+        return set(fields) | set(expandable)
+
+    unknown = (requested or set()) - set(fields) - set(expandable)
+    unknown |= (expand or set()) - set(expandable)
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown))}")
+
+    selected = set(fields) if requested is None else set(requested)
+    return selected | (expand or set())
+
+def render_fields(instance, getters, selected):
+    """Build a payload dict from the selected entries of an ordered {key: getter} map."""
+    return {key: getter(instance) for key, getter in getters.items() if key in selected}
@@ -1,16 +1,19 @@
 from .auth_views import (
-    CustomTokenObtainPairView, LogoutView, AuthCheckView, 
-    RequestPasswordResetCodeView, ChangePasswordView, RegisterUserView
+    CustomTokenObtainPairView, CookieTokenRefreshView, LogoutView, AuthCheckView, 
+    RequestPasswordResetCodeView, ChangePasswordView, RegisterUserView,
+    ImportUsersView
 )
 
 from .user_views import (
     FetchUserDetailsView, UpdateProfileView, FetchUsersView,
-    FetchTeamLeadersView,FetchWorkingHoursView,FetchAllUsers
+    FetchTeamLeadersView,FetchWorkingHoursView,FetchAllUsers,
+    SearchUsersView, FetchUserChoicesView
 )
 
 from .project_views import (
     CreateProjectView,FetchProjectsView, FetchAssignedProjectsView,
-    EditProjectView, DeleteProjectView, FetchProjectTeamLeadersView
+    EditProjectView, DeleteProjectView, FetchProjectTeamLeadersView,
+    ProjectDashboardView
 )
 from .team_views import (
     CreateTeamView, FetchTeamsView, GetAssignedTeamView,
@@ -20,7 +23,9 @@ from .team_views import (
 
 from .task_views import (
     CreateTaskView, FetchTasksView,
-    EditTaskView, DeleteTaskView,AssignTaskView
+    EditTaskView, DeleteTaskView,AssignTaskView,
+    FetchTaskCountsView, BulkCreateTasksView, BulkAssignTasksView,
+    TaskHoursView
 )
 
 from .timesheet_views import (
@@ -33,6 +38,10 @@ from .timesheet_views import (
     FetchTimesheetTablesView
 )
 
+from .deletion_views import (
+    DeletionJobStatusView
+)
+
 from .message_view import (
     CustomMessageView
 )
\ No newline at end of file
@@ -1,23 +1,37 @@
 from rest_framework.views import APIView
 from rest_framework import permissions, status
-from django.contrib.auth import authenticate
 from timesheet_app.models import CustomUser
 from django.contrib.auth.hashers import check_password, make_password
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken # type: ignore
+from rest_framework_simplejwt.exceptions import TokenError # type: ignore
+from rest_framework_simplejwt.settings import api_settings # type: ignore
+from timesheet_app.tokens import (
+    RoleRefreshToken, REFRESH_TOKEN_COOKIE_PATH, set_access_token_cookie, set_refresh_token_cookie
+)
 from django.utils import timezone
 from datetime import timedelta
 from django.http import JsonResponse
+from django.utils.crypto import get_random_string
 from timesheet_app.utils import send_telegram_message
+from timesheet_app.user_import import IMPORT_REQUEST_MAX_ROWS, IMPORTABLE_USERTYPES, import_users, parse_user_rows
 import random
 from django.contrib.auth import update_session_auth_hash
-from django.core.cache import cache
+from timesheet_app.cache import shared_cache
 import logging
 
 logger = logging.getLogger(__name__)
 
 
 
+# Hash checked for unknown usernames so a miss costs the same as a wrong password
+_dummy_password_hash = None
+
+def get_dummy_password_hash():
+    global _dummy_password_hash
+    if _dummy_password_hash is None:
+        _dummy_password_hash = make_password(get_random_string(32))
+    return _dummy_password_hash
+
 # Login 
 class CustomTokenObtainPairView(APIView):
     permission_classes = [permissions.AllowAny]
@@ -26,40 +40,37 @@ class CustomTokenObtainPairView(APIView):
         username = request.data.get("username")
         password = request.data.get("password")
 
-        user = authenticate(username=username, password=password)
-        if user:
-            return self.generate_token_response(user)
-        try:
-            user = CustomUser.objects.get(username=username)
-        except CustomUser.DoesNotExist:
+        # One lookup and one password hash, whether or not the user exists
+        user = CustomUser.objects.filter(username=username).first() if username else None
+        if user is None:
+            check_password(password, get_dummy_password_hash())
             return Response(
                 {"message": "Username is incorrect", "status": "failure", "error": "username"},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        # If username exists but password is incorrect
-        if not check_password(password, user.password):
+        if not user.check_password(password):
             return Response(
                 {"message": "Password is incorrect", "status": "failure", "error": "password"},
                 status=status.HTTP_401_UNAUTHORIZED
             )
 
-        return Response(
-            {"message": "Authentication failed", "status": "failure"},
-            status=status.HTTP_401_UNAUTHORIZED
-        )
-    
-    def generate_token_response(self, user):
-        access_token = RefreshToken.for_user(user).access_token
+        if not user.is_active:
+            return Response(
+                {"message": "Authentication failed", "status": "failure"},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+
+        return self.generate_token_response(user)
     
-        access_token.set_exp(lifetime=timedelta(days=2))
+    def generate_token_response(self, user, message="Login successful"):
+        refresh_token = RoleRefreshToken.for_user(user)
+        access_token = refresh_token.access_token
         
         access_token_expiry_local = timezone.localtime(timezone.now() + timedelta(seconds=access_token.lifetime.total_seconds()))
 
-        print(access_token_expiry_local)
-
         response = JsonResponse({
-            "message": "Login successful",
+            "message": message,
             "status": "success",
             "firstname": user.firstname,
             "username": user.username,
@@ -69,24 +80,54 @@ class CustomTokenObtainPairView(APIView):
             "access_token_expiry": access_token_expiry_local.strftime("%Y-%m-%d %H:%M:%S")
         })
 
-        response.set_cookie(
-            key="access_token",
-            value=str(access_token),
-            httponly=True,
-            secure=True,
-            samesite="None",
-            max_age=2 * 24 * 60 * 60,  
-        )
+        set_access_token_cookie(response, access_token)
+        set_refresh_token_cookie(response, refresh_token)
         return response
 
+# Refresh the access token from the refresh token cookie, without touching the password hasher
+class CookieTokenRefreshView(APIView):
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+
+    def post(self, request, *args, **kwargs):
+        raw_refresh_token = request.COOKIES.get("refresh_token")
+        if not raw_refresh_token:
+            return Response({"message": "Refresh token missing", "status": "failure"}, status=status.HTTP_401_UNAUTHORIZED)
+
+        # Also rejects blacklisted tokens, i.e. already rotated or logged out
+        try:
+            refresh_token = RoleRefreshToken(raw_refresh_token)
+        except TokenError:
+            return Response({"message": "Refresh token is invalid or expired", "status": "failure"}, status=status.HTTP_401_UNAUTHORIZED)
+
+        # Reload the user so role changes and deactivation take effect on renewal
+        user = CustomUser.objects.filter(
+            id=refresh_token[api_settings.USER_ID_CLAIM], is_active=True
+        ).only("id", "username", "firstname", "email", "usertype", "team", "subteam").first()
+        if not user:
+            return Response({"message": "User not found", "status": "failure"}, status=status.HTTP_401_UNAUTHORIZED)
+
+        # A new refresh token is issued on every renewal (rotation) and the
+        # presented one can never be used again
+        refresh_token.blacklist()
+        return CustomTokenObtainPairView().generate_token_response(user, message="Token refreshed")
+
 # Logout
 class LogoutView(APIView):
     def post(self, request):
+        # Revoke the refresh token; it only reaches token/logout/ (see REFRESH_TOKEN_COOKIE_PATH)
+        raw_refresh_token = request.COOKIES.get("refresh_token")
+        if raw_refresh_token:
+            try:
+                RoleRefreshToken(raw_refresh_token).blacklist()
+            except TokenError:
+                pass
+
         response = JsonResponse({"message": "Logout successful", "status": "success"})
         
         # Remove authentication cookies by setting them to an empty value and expiring them
-        response.delete_cookie("access_token")
-        response.delete_cookie("refresh_token")
+        response.delete_cookie("access_token", samesite="None")
+        response.delete_cookie("refresh_token", path=REFRESH_TOKEN_COOKIE_PATH, samesite="None")
 
         return response
     
@@ -112,7 +153,7 @@ class RequestPasswordResetCodeView(APIView):
 
      
         verification_code = str(random.randint(100000, 999999))
-        cache.set(f"reset_code_{user.id}", verification_code, timeout=600)  
+        shared_cache.set(f"reset_code_{user.id}", verification_code, timeout=600)  
         
         message = f"Your password reset verification code is: {verification_code}"
         send_telegram_message(user.chat_id, message)
@@ -158,7 +199,7 @@ class ChangePasswordView(APIView):
             if not user:
                 return Response({"message": "User not found"}, status=status.HTTP_404_NOT_FOUND)
 
-            stored_code = cache.get(f"reset_code_{user.id}")
+            stored_code = shared_cache.get(f"reset_code_{user.id}")
 
             if not stored_code or str(stored_code) != str(verification_code):
                 return Response({"message": "Invalid or expired verification code"}, status=status.HTTP_400_BAD_REQUEST)
@@ -169,7 +210,7 @@ class ChangePasswordView(APIView):
             user.set_password(new_password)
             user.save()
 
-            cache.delete(f"reset_code_{user.id}")
+            shared_cache.delete(f"reset_code_{user.id}")
 
             message = "Your password has been successfully reset. If you did not request this, contact support."
             send_telegram_message(user.chat_id, message)
@@ -236,3 +277,44 @@ class RegisterUserView(APIView):
         except Exception as e:
             logger.error(f"User registration failed: {str(e)}", exc_info=True)
             return Response({"message": "Registration failed", "status": "failure"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+# Bulk User Import (CSV/JSON file upload or a JSON list in "users"), up to
+# IMPORT_REQUEST_MAX_ROWS rows; larger files go through `manage.py import_users`
+class ImportUsersView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        usertypes = IMPORTABLE_USERTYPES.get(request.user.usertype)
+        if usertypes is None:
+            return Response({"message": "Permission denied", "status": "failure"}, status=status.HTTP_403_FORBIDDEN)
+
+        upload = request.FILES.get("file")
+        try:
+            if upload:
+                file_format = upload.name.rsplit(".", 1)[-1].lower()
+                rows = parse_user_rows(upload.read(), file_format)
+            else:
+                rows = request.data.get("users")
+                if not isinstance(rows, list):
+                    raise ValueError("Provide a CSV/JSON file or a list of users")
+        except (ValueError, UnicodeDecodeError) as e:
+            return Response({"message": str(e), "status": "failure"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > IMPORT_REQUEST_MAX_ROWS:
+            return Response({
+                "message": f"At most {IMPORT_REQUEST_MAX_ROWS} users per request; use `manage.py import_users` for larger imports",
+                "status": "failure",
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            result = import_users(rows, usertypes=usertypes)
+        except Exception as e:
+            logger.error(f"User import failed: {str(e)}", exc_info=True)
+            return Response({"message": "Import failed", "status": "failure"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        logger.info(f"Imported {len(result['created'])} users, skipped {len(result['errors'])} rows.")
+        return Response({
+            "message": "Users imported",
+            "status": "success" if not result["errors"] else "partial_success",
+            "created": result["created"],
+            "errors": result["errors"],
+        }, status=status.HTTP_201_CREATED if result["created"] else status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,36 @@
+from rest_framework.views import APIView
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from timesheet_app.models import DeletionJob
+
+
+# Progress of a background delete started by one of the Delete*View endpoints
+class DeletionJobStatusView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, job_id, *args, **kwargs):
+        user = request.user
+        jobs = DeletionJob.objects.all()
+        if user.usertype != 'SuperAdmin':
+            jobs = jobs.filter(requested_by_id=user.id)
+
+        job = jobs.filter(id=job_id).first()
+        if not job:
+            return Response({"message": "Deletion job not found", "status": "failure"}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({
+            "job": {
+                "id": job.id,
+                "model": job.model,
+                "object_id": job.object_id,
+                "object": job.object_repr,
+                "status": job.status,
+                "progress": job.progress,
+                "deleted_rows": job.deleted_rows,
+                "total_rows": job.total_rows,
+                "error": job.error or None,
+                "created_at": job.created_at,
+                "finished_at": job.finished_at,
+            },
+            "status": "success",
+        }, status=status.HTTP_200_OK)
@@ -1,8 +1,118 @@
 from rest_framework.views import APIView
 from rest_framework import permissions, status
-from timesheet_app.models import Project,CustomUser, Team
+from timesheet_app.models import Project,CustomUser, Team, TeamRole, ProjectMembership
 from rest_framework.response import Response
-from timesheet_app.utils import send_telegram_message
+from timesheet_app.utils import queue_telegram_message, parse_fieldset, render_fields
+from timesheet_app.negotiation import PayloadFormatNegotiation, wants_normalized
+from timesheet_app.dashboards import get_project_dashboard, project_schedule
+from timesheet_app.deletions import schedule_deletion
+from timesheet_app.membership_graph import get_membership_graph
+from django.db.models import Prefetch
+from django.utils.dateparse import parse_date
+import datetime
+
+TEAM_LEADER_FIELDS = ('team_leader_search', 'team_leader_creative', 'team_leader_development')
+
+# Team.roles, loaded once per query with the leader columns given; the
+# team_leader_* properties read them without further queries
+def prefetch_team_leaders(user_columns):
+    roles = TeamRole.objects.filter(role=TeamRole.TEAM_LEADER).select_related('user').only(
+        'team', 'role', 'discipline', 'user', *[f"user__{column}" for column in user_columns]
+    )
+    return Prefetch('roles', queryset=roles)
+
+# Plain project columns and expandable relations, in payload order (see parse_fieldset)
+PROJECT_FIELDS = ('id', 'name', 'description', 'status', 'start_date', 'deadline', 'created_by')
+PROJECT_EXPANSIONS = ('teams',)
+
+# Columns loaded for every embedded user, so ?format=normalized can list each
+# user once whichever relation it was reached through
+USER_REF_COLUMNS = ('id', 'username', 'subteam', 'team')
+
+# Prefetch plan for serialize_projects: one query for the requested project
+# columns, plus a fixed four for the teams only when they are expanded
+def with_project_relations(projects, selected=PROJECT_FIELDS + PROJECT_EXPANSIONS):
+    columns = ['id'] + [field for field in PROJECT_FIELDS if field in selected and field not in ('id', 'created_by')]
+    if 'created_by' in selected:
+        projects = projects.select_related('created_by')
+        columns.append('created_by__username')
+    projects = projects.only(*columns)
+
+    if 'teams' not in selected:
+        return projects
+    teams = Team.objects.only('id', 'name').prefetch_related(
+        prefetch_team_leaders(USER_REF_COLUMNS),
+        Prefetch('account_managers', queryset=CustomUser.objects.only(*USER_REF_COLUMNS)),
+        Prefetch('members', queryset=CustomUser.objects.only(*USER_REF_COLUMNS)),
+    )
+    return projects.prefetch_related(Prefetch('teams_assigned', queryset=teams))
+
+def serialize_user_ref(user):
+    return {"id": user.id, "username": user.username} if user else None
+
+def serialize_member_ref(member):
+    return {
+        "id": member.id,
+        "username": member.username,
+        "subteam": member.subteam,
+        "team": member.team,
+    }
+
+def add_user_ref(users, user, serialize=serialize_member_ref):
+    """Record `user` in a normalized `users` table and return its id reference."""
+    if user is None:
+        return None
+    if user.id not in users:
+        users[user.id] = serialize(user)
+    return user.id
+
+def serialize_project_team(team, user_ref=serialize_user_ref, member_ref=serialize_member_ref):
+    return {
+        "id": team.id,
+        "name": team.name,
+        "account_managers": [
+            user_ref(manager) for manager in team.account_managers.all()
+        ],
+        "team_leader_search": user_ref(team.team_leader_search),
+        "team_leader_creative": user_ref(team.team_leader_creative),
+        "team_leader_development": user_ref(team.team_leader_development),
+        "subteams": [member_ref(member) for member in team.members.all()]
+    }
+
+PROJECT_PAYLOAD = {
+    "id": lambda project: project.id,
+    "name": lambda project: project.name,
+    "description": lambda project: project.description,
+    "status": lambda project: project.status,
+    "start_date": lambda project: project.start_date,
+    "deadline": lambda project: project.deadline,
+    "created_by": lambda project: project.created_by.username,
+    "teams": lambda project: [serialize_project_team(team) for team in project.teams_assigned.all()],
+}
+
+def serialize_projects(projects, selected=PROJECT_FIELDS + PROJECT_EXPANSIONS):
+    return [render_fields(project, PROJECT_PAYLOAD, selected) for project in projects]
+
+# ?format=normalized: every project, team and user is serialized once into a
+# table keyed by id, and nested objects become id references
+def normalize_projects(projects, selected=PROJECT_FIELDS + PROJECT_EXPANSIONS):
+    tables = {"projects": {}, "teams": {}, "users": {}}
+
+    def user_ref(user):
+        return add_user_ref(tables["users"], user)
+
+    def team_ref(team):
+        if team.id not in tables["teams"]:
+            tables["teams"][team.id] = serialize_project_team(team, user_ref, user_ref)
+        return team.id
+
+    getters = {
+        **PROJECT_PAYLOAD,
+        "teams": lambda project: [team_ref(team) for team in project.teams_assigned.all()],
+    }
+    for project in projects:
+        tables["projects"][project.id] = render_fields(project, getters, selected)
+    return tables
 
 # Create Project
 class CreateProjectView(APIView):
@@ -40,9 +150,14 @@ class CreateProjectView(APIView):
 # Fetch Projects Based on the User Type
 class FetchProjectsView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    content_negotiation_class = PayloadFormatNegotiation
 
     def get(self, request):
         user = request.user
+        try:
+            selected = parse_fieldset(request.query_params, PROJECT_FIELDS, PROJECT_EXPANSIONS)
+        except ValueError as e:
+            return Response({"message": str(e), "status": "failure"}, status=status.HTTP_400_BAD_REQUEST)
 
         if user.usertype == 'SuperAdmin':
             projects = Project.objects.all()
@@ -51,124 +166,78 @@ class FetchProjectsView(APIView):
         else:
             projects = Project.objects.none()
 
-        project_data = self.serialize_projects(projects)
+        projects = with_project_relations(projects, selected)
+        if wants_normalized(request):
+            return Response(normalize_projects(projects, selected), status=status.HTTP_200_OK)
+        project_data = serialize_projects(projects, selected)
         return Response({"projects": project_data}, status=status.HTTP_200_OK)
 
-    def serialize_projects(self, projects):
-        return [
-            {
-                "id": project.id,
-                "name": project.name,
-                "description": project.description,
-                "status": project.status,  
-                "start_date": project.start_date,
-                "deadline": project.deadline,
-                "created_by": project.created_by.username,
-                "teams": [
-                        {
-                            "id": team.id,
-                            "name": team.name,
-                            "account_managers": [
-                                {"id": manager.id, "username": manager.username}
-                                for manager in team.account_managers.all()
-                            ],
-                            "team_leader_search": {
-                                "id": team.team_leader_search.id,
-                                "username": team.team_leader_search.username
-                            } if team.team_leader_search else None,
-                            "team_leader_creative": {
-                                "id": team.team_leader_creative.id,
-                                "username": team.team_leader_creative.username
-                            } if team.team_leader_creative else None,
-                            "team_leader_development": {
-                                "id": team.team_leader_development.id,
-                                "username": team.team_leader_development.username
-                            } if team.team_leader_development else None,
-                            "subteams": [
-                                {
-                                    "id": member.id,
-                                    "username": member.username,
-                                    "subteam": member.subteam,
-                                } for member in team.members.all()
-                            ]
-                        }
-                        for team in project.teams_assigned.all()  
-                ],
-            }
-            for project in projects
-        ]
+# Membership roles that make a project visible to each user type
+ASSIGNED_PROJECT_ROLES = {
+    'Admin': [ProjectMembership.CREATOR, ProjectMembership.ACCOUNT_MANAGER],
+    'TeamLeader': [ProjectMembership.TEAM_LEADER],
+    'User': [ProjectMembership.MEMBER],
+}
+
+# Membership roles held through a team assigned to the project
+ASSIGNED_TEAM_ROLES = [ProjectMembership.ACCOUNT_MANAGER, ProjectMembership.TEAM_LEADER, ProjectMembership.MEMBER]
 
 # Fetch Assigned Projects Based on the User Type
 class FetchAssignedProjectsView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    content_negotiation_class = PayloadFormatNegotiation
 
     def get(self, request, *args, **kwargs):
         user = request.user
+        try:
+            selected = parse_fieldset(request.query_params, PROJECT_FIELDS, PROJECT_EXPANSIONS)
+        except ValueError as e:
+            return Response({"message": str(e), "status": "failure"}, status=status.HTTP_400_BAD_REQUEST)
 
-        if user.usertype in ['Admin', 'TeamLeader', 'User']:
-            if user.usertype == 'Admin':
-                created_projects = Project.objects.filter(created_by=user)
-                assigned_projects = Project.objects.filter(teams_assigned__account_managers__id=user.id)
-                projects = (created_projects | assigned_projects).distinct()  
-            elif user.usertype == 'TeamLeader':
-                teams = Team.objects.filter(
-                    team_leader_search=user
-                ) | Team.objects.filter(
-                    team_leader_development=user
-                ) | Team.objects.filter(
-                    team_leader_creative=user
-                )
-                projects = Project.objects.filter(teams_assigned__in=teams).distinct()
-            elif user.usertype == 'User':
-                teams = Team.objects.filter(members=user)
-                projects = Project.objects.filter(teams_assigned__in=teams).distinct()
-            project_data = [
-                {
-                    "id": project.id,
-                    "name": project.name,
-                    "description": project.description,
-                    "status": project.status,
-                    "start_date": project.start_date,
-                    "deadline": project.deadline,
-                    "created_by": project.created_by.username,
-                    "teams": [
-                        {
-                            "id": team.id,
-                            "name": team.name,
-                            "account_managers": [
-                                {"id": manager.id, "username": manager.username}
-                                for manager in team.account_managers.all()
-                            ],
-                            "team_leader_search": {
-                                "id": team.team_leader_search.id,
-                                "username": team.team_leader_search.username
-                            } if team.team_leader_search else None,
-                            "team_leader_creative": {
-                                "id": team.team_leader_creative.id,
-                                "username": team.team_leader_creative.username
-                            } if team.team_leader_creative else None,
-                            "team_leader_development": {
-                                "id": team.team_leader_development.id,
-                                "username": team.team_leader_development.username
-                            } if team.team_leader_development else None,
-                            "subteams": [
-                                {
-                                    "id": member.id,
-                                    "username": member.username,
-                                    "subteam": member.subteam,
-                                    "team":member.team
-                                } for member in team.members.all()
-                            ]
-                        }
-                        for team in project.teams_assigned.all()  
-                    ],
-                }
-                for project in projects
-            ]
+        if user.usertype in ASSIGNED_PROJECT_ROLES:
+            project_ids = get_membership_graph().project_ids(user.id, ASSIGNED_PROJECT_ROLES[user.usertype])
+            projects = with_project_relations(Project.objects.filter(id__in=project_ids), selected)
+            if wants_normalized(request):
+                return Response(normalize_projects(projects, selected), status=status.HTTP_200_OK)
+            project_data = serialize_projects(projects, selected)
             return Response({"projects": project_data}, status=status.HTTP_200_OK)
 
         return Response({"message": "Permission denied", "status": "failure"}, status=status.HTTP_403_FORBIDDEN)
 
+# Project Dashboard: hours per day, team, subteam and user against the planned span
+class ProjectDashboardView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, project_id, *args, **kwargs):
+        user = request.user
+        projects = Project.objects.only('id', 'name', 'status', 'start_date', 'deadline')
+
+        if user.usertype in ('Admin', 'TeamLeader'):
+            projects = projects.filter(id__in=ProjectMembership.objects.filter(
+                user_id=user.id, role__in=ASSIGNED_PROJECT_ROLES[user.usertype]
+            ).values('project_id'))
+        elif user.usertype != 'SuperAdmin':
+            return Response({"message": "Permission denied", "status": "failure"}, status=status.HTTP_403_FORBIDDEN)
+
+        project = projects.filter(id=project_id).first()
+        if not project:
+            return Response({"message": "Project not found", "status": "failure"}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            start = parse_date(request.query_params.get('start') or '') or project.start_date
+            end = parse_date(request.query_params.get('end') or '') or max(project.deadline, datetime.date.today())
+        except ValueError:
+            return Response({"message": "Invalid date, expected YYYY-MM-DD", "status": "failure"}, status=status.HTTP_400_BAD_REQUEST)
+        if start > end:
+            return Response({"message": "start must not be after end", "status": "failure"}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "project": {"id": project.id, "name": project.name, "status": project.status},
+            "schedule": project_schedule(project),
+            "range": {"start": start, "end": end},
+            **get_project_dashboard(project.id, start, end),
+        }, status=status.HTTP_200_OK)
+
 # Edit Project
 class EditProjectView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -194,39 +263,29 @@ class EditProjectView(APIView):
         except Exception as e:
             return Response({"message": "Failed to update project", "status": "failure"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-# Delete Project
+# Delete Project: hidden at once, then removed in chunks by a background DeletionJob
 class DeleteProjectView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def delete(self, request, project_id, *args, **kwargs):
         try:
-            
-            project = Project.objects.get(id=project_id)
-          
-            users_to_notify = set() 
+            project = Project.objects.only('id', 'name', 'created_by').get(id=project_id)
 
-            for team in project.teams.all(): 
-                users_to_notify.update(team.members.all())  
-
-                if team.account_manager:
-                    users_to_notify.add(team.account_manager)
-                if team.team_leader_search:
-                    users_to_notify.add(team.team_leader_search)
-                if team.team_leader_development:
-                    users_to_notify.add(team.team_leader_development)
-                if team.team_leader_creative:
-                    users_to_notify.add(team.team_leader_creative)
+            # Everyone on a team assigned to the project, read before the job clears it
+            users_to_notify = list(CustomUser.objects.filter(
+                project_memberships__project_id=project.id,
+                project_memberships__role__in=ASSIGNED_TEAM_ROLES,
+            ).distinct().only('id', 'chat_id'))
 
+            job = schedule_deletion(project, requested_by=request.user)
 
+            message = f"The project <b>{project.name}</b> has been deleted. You have been removed from this project."
             for user in users_to_notify:
-                message = f"The project <b>{project.name}</b> has been deleted. You have been removed from this project."
-                send_telegram_message(user.chat_id, message)
-
-            project.delete()
+                queue_telegram_message(user.chat_id, message)
 
             return Response(
-                {"message": "Project deleted successfully", "status": "success"},
-                status=status.HTTP_200_OK,
+                {"message": "Project deleted successfully", "status": "success", "job_id": job.id},
+                status=status.HTTP_202_ACCEPTED,
             )
 
         except Project.DoesNotExist:
@@ -2,8 +2,14 @@ from rest_framework.views import APIView
 from rest_framework import permissions, status
 from timesheet_app.models import CustomUser, Task, Project
 from rest_framework.response import Response
-from timesheet_app.utils import send_telegram_message
-from django.db.models import Q
+from timesheet_app.utils import send_telegram_message, queue_telegram_message, parse_fieldset, render_fields, split_param
+from django.db import connection, transaction
+from django.db.models import Q, Case, Count, IntegerField, Value, When
+from django.utils.dateparse import parse_date
+from collections import defaultdict
+from timesheet_app.dashboards import build_task_hours
+from timesheet_app.membership_graph import get_membership_graph
+from timesheet_app.views.project_views import ASSIGNED_PROJECT_ROLES
 import logging
 logger  = logging.getLogger(__name__)
 
@@ -28,12 +34,10 @@ class CreateTaskView(APIView):
             print(project)
             assigned_to = CustomUser.objects.get(id=assigned_to_id) if assigned_to_id else None
 
-            if created_by.usertype == 'SuperAdmin' and assigned_to and assigned_to.usertype != 'Admin':
-                return Response({"message": "SuperAdmin can only assign tasks to Admins"}, status=status.HTTP_400_BAD_REQUEST)
-            if created_by.usertype == 'Admin' and assigned_to and assigned_to.usertype != 'TeamLeader':
-                return Response({"message": "Admin can only assign tasks to TeamLeaders"}, status=status.HTTP_400_BAD_REQUEST)
-            if created_by.usertype == 'TeamLeader' and assigned_to and assigned_to.usertype != 'User':
-                return Response({"message": "TeamLeader can only assign tasks to Users"}, status=status.HTTP_400_BAD_REQUEST)
+            if assigned_to and created_by.usertype in Task.ASSIGNABLE_USERTYPES:
+                error = Task.assignment_error(created_by.usertype, assigned_to.usertype)
+                if error:
+                    return Response({"message": error}, status=status.HTTP_400_BAD_REQUEST)
 
             task = Task.objects.create(
                 title=title,
@@ -46,14 +50,7 @@ class CreateTaskView(APIView):
                 created_by=created_by,
             )
            
-            if created_by.usertype == 'SuperAdmin':
-                task.superadmin_assigned_to = assigned_to
-            elif created_by.usertype == 'Admin':
-                task.admin_assigned_to = assigned_to
-            elif created_by.usertype == 'TeamLeader':
-                task.teamleader_assigned_to = assigned_to
-
-            task.save()
+            task.assign_task(created_by, assigned_to)
             
             if assigned_to and assigned_to.chat_id:
                 message = (
@@ -76,58 +73,230 @@ class CreateTaskView(APIView):
             print(str(e))
             return Response({"message": f"Error: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+# Plain task columns and expandable relations (see parse_fieldset)
+TASK_FIELDS = ('id', 'title', 'description', 'status', 'priority', 'start_date', 'end_date')
+TASK_EXPANSIONS = ('project', 'assigned_to', 'created_by')
+TASK_ASSIGNEE_FIELDS = ('superadmin_assigned_to', 'admin_assigned_to', 'teamleader_assigned_to')
+
+# Joins only the requested relations into the task query. The creator and
+# assignee id columns are always loaded so FetchTasksView can split the rows
+def with_task_relations(tasks, selected):
+    columns = ['id', 'created_by', *TASK_ASSIGNEE_FIELDS] + [field for field in TASK_FIELDS if field in selected and field != 'id']
+    related = {
+        'project': ['project'],
+        'assigned_to': list(TASK_ASSIGNEE_FIELDS),
+        'created_by': ['created_by'],
+    }
+    related_columns = {
+        'project': ('id', 'name'),
+        'assigned_to': ('id', 'username'),
+        'created_by': ('id', 'username', 'usertype'),
+    }
+    for relation, lookups in related.items():
+        if relation in selected:
+            tasks = tasks.select_related(*lookups)
+            columns += [f"{lookup}__{column}" for lookup in lookups for column in related_columns[relation]]
+    return tasks.only(*columns)
+
+def serialize_assignee(user):
+    return {"id": user.id, "username": user.username} if user else None
+
+TASK_PAYLOAD = {
+    "id": lambda task: task.id,
+    "title": lambda task: task.title,
+    "description": lambda task: task.description,
+    "status": lambda task: task.status,
+    "priority": lambda task: task.priority,
+    "start_date": lambda task: task.start_date,
+    "end_date": lambda task: task.end_date,
+    "project": lambda task: {
+        "id": task.project.id,
+        "name": task.project.name
+    } if task.project else None,
+    "assigned_to": lambda task: {
+        "superadmin": serialize_assignee(task.superadmin_assigned_to),
+        "admin": serialize_assignee(task.admin_assigned_to),
+        "teamleader": serialize_assignee(task.teamleader_assigned_to),
+    },
+    "created_by": lambda task: {
+        "id": task.created_by.id,
+        "username": task.created_by.username,
+        "usertype": task.created_by.usertype
+    },
+}
+
+# Task board parameters: ?role=created|assigned narrows the scope, ?status=,
+# ?priority= (comma-separated), ?project=, ?due_after= and ?due_before= filter
+# it, and ?ordering= sorts it (prefix a field with - for descending)
+TASK_ROLES = ('created', 'assigned')
+TASK_ORDERING_FIELDS = ('id', 'title', 'status', 'priority', 'start_date', 'end_date')
+
+# Tasks of hidden projects drop out at once, while their DeletionJob runs
+VISIBLE_TASKS = Q(project__is_hidden=False)
+
+def task_scope(user, role=None):
+    """Tasks `user` created and/or is assigned to, as a Q."""
+    created = Q(created_by=user)
+    assigned = Q(superadmin_assigned_to=user) | Q(admin_assigned_to=user) | Q(teamleader_assigned_to=user)
+    return {'created': created, 'assigned': assigned}.get(role, created | assigned)
+
+def _parse_choices(query_params, name, choices):
+    values = split_param(query_params.get(name))
+    if values is None:
+        return None
+    unknown = values - set(choices)
+    if unknown:
+        raise ValueError(f"Unknown {name}: {', '.join(sorted(unknown))}")
+    return values
+
+def _parse_date_param(query_params, name):
+    value = query_params.get(name)
+    if not value:
+        return None
+    try:
+        date = parse_date(value)
+    except ValueError:
+        date = None
+    if date is None:
+        raise ValueError(f"Invalid {name}: expected YYYY-MM-DD")
+    return date
+
+def parse_task_filters(user, query_params):
+    """Return the Q selecting the caller's tasks for the board parameters. Raises ValueError."""
+    role = query_params.get('role')
+    if role and role not in TASK_ROLES:
+        raise ValueError(f"Unknown role: {role}")
+    filters = task_scope(user, role) & VISIBLE_TASKS
+
+    statuses = _parse_choices(query_params, 'status', [value for value, _ in Task.STATUS_CHOICES])
+    if statuses:
+        filters &= Q(status__in=statuses)
+    priorities = _parse_choices(query_params, 'priority', Task.PRIORITY_LEVELS)
+    if priorities:
+        filters &= Q(priority__in=priorities)
+    project = query_params.get('project')
+    if project:
+        if not project.isdigit():
+            raise ValueError(f"Invalid project: {project}")
+        filters &= Q(project_id=int(project))
+    due_after = _parse_date_param(query_params, 'due_after')
+    if due_after:
+        filters &= Q(end_date__gte=due_after)
+    due_before = _parse_date_param(query_params, 'due_before')
+    if due_before:
+        filters &= Q(end_date__lte=due_before)
+    return filters
+
+def order_tasks(tasks, query_params):
+    """Apply ?ordering=; ties and the default fall back to id. Raises ValueError."""
+    ordering = []
+    for name in (query_params.get('ordering') or '').split(','):
+        name = name.strip()
+        if not name:
+            continue
+        field = name.lstrip('-')
+        if field not in TASK_ORDERING_FIELDS:
+            raise ValueError(f"Unknown ordering field: {field}")
+        if field == 'priority':
+            # By level, with unlisted priorities last
+            tasks = tasks.annotate(priority_rank=Case(
+                *[When(priority=level, then=Value(rank)) for rank, level in enumerate(Task.PRIORITY_LEVELS)],
+                default=Value(len(Task.PRIORITY_LEVELS)), output_field=IntegerField(),
+            ))
+            field = 'priority_rank'
+        ordering.append(f"-{field}" if name.startswith('-') else field)
+    return tasks.order_by(*ordering, 'id')
+
 # Fetch Tasks in the TaskList
 class FetchTasksView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     def get(self, request, *args, **kwargs):
         user = request.user
-        created_tasks = Task.objects.filter(created_by=user)
-        assigned_tasks = Task.objects.filter(
-            Q(superadmin_assigned_to=user) |
-            Q(admin_assigned_to=user) |
-            Q(teamleader_assigned_to=user) 
+        try:
+            selected = parse_fieldset(request.query_params, TASK_FIELDS, TASK_EXPANSIONS)
+            filters = parse_task_filters(user, request.query_params)
+            tasks = order_tasks(Task.objects.filter(filters), request.query_params)
+        except ValueError as e:
+            return Response({"message": str(e), "status": "failure"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # One query for both lists, split by role below; a task the user
+        # created and is assigned to appears in both
+        tasks = with_task_relations(tasks, selected)
+        created_tasks, assigned_tasks = [], []
+        for task in tasks:
+            if task.created_by_id == user.id:
+                created_tasks.append(task)
+            if user.id in (task.superadmin_assigned_to_id, task.admin_assigned_to_id, task.teamleader_assigned_to_id):
+                assigned_tasks.append(task)
+
+        return Response(
+            {
+                "created_tasks": [render_fields(task, TASK_PAYLOAD, selected) for task in created_tasks],
+                "assigned_tasks": [render_fields(task, TASK_PAYLOAD, selected) for task in assigned_tasks],
+            },
+            status=status.HTTP_200_OK,
         )
-        def serialize_task(task):
-            return {
+
+# Task board counts: totals per status and per priority for the same scope and
+# filters as FetchTasksView, in one conditional-aggregation query
+class FetchTaskCountsView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            filters = parse_task_filters(request.user, request.query_params)
+        except ValueError as e:
+            return Response({"message": str(e), "status": "failure"}, status=status.HTTP_400_BAD_REQUEST)
+
+        statuses = [value for value, _ in Task.STATUS_CHOICES]
+        # Aliases are positional: choice values contain spaces
+        aggregates = {"total": Count('id')}
+        aggregates.update({f"status_{index}": Count('id', filter=Q(status=value)) for index, value in enumerate(statuses)})
+        aggregates.update({f"priority_{index}": Count('id', filter=Q(priority=value)) for index, value in enumerate(Task.PRIORITY_LEVELS)})
+        totals = Task.objects.filter(filters).aggregate(**aggregates)
+
+        return Response({
+            "counts": {
+                "total": totals["total"],
+                "status": {value: totals[f"status_{index}"] for index, value in enumerate(statuses)},
+                "priority": {value: totals[f"priority_{index}"] for index, value in enumerate(Task.PRIORITY_LEVELS)},
+            },
+            "status": "success",
+        }, status=status.HTTP_200_OK)
+
+# Task Hours: time logged against a task through Timesheet.linked_task
+class TaskHoursView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, task_id, *args, **kwargs):
+        user = request.user
+        tasks = Task.objects.filter(VISIBLE_TASKS).select_related('project').only(
+            'id', 'title', 'status', 'priority', 'start_date', 'end_date', 'project__id', 'project__name'
+        )
+        if user.usertype != 'SuperAdmin':
+            # The task's creator and assignees, and whoever sees its project
+            visible = task_scope(user)
+            if user.usertype in ('Admin', 'TeamLeader'):
+                project_ids = get_membership_graph().project_ids(user.id, ASSIGNED_PROJECT_ROLES[user.usertype])
+                visible |= Q(project_id__in=project_ids)
+            tasks = tasks.filter(visible)
+
+        task = tasks.filter(id=task_id).first()
+        if not task:
+            return Response({"message": "Task not found", "status": "failure"}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({
+            "task": {
                 "id": task.id,
                 "title": task.title,
-                "description": task.description,
                 "status": task.status,
                 "priority": task.priority,
                 "start_date": task.start_date,
                 "end_date": task.end_date,
-               "project": {
-                    "id": task.project.id,
-                    "name": task.project.name  
-                } if task.project else None,
-                "assigned_to": {
-                    "superadmin": {
-                        "id": task.superadmin_assigned_to.id,
-                        "username": task.superadmin_assigned_to.username
-                    } if task.superadmin_assigned_to else None,
-                    "admin": {
-                        "id": task.admin_assigned_to.id,
-                        "username": task.admin_assigned_to.username
-                    } if task.admin_assigned_to else None,
-                    "teamleader": {
-                        "id": task.teamleader_assigned_to.id,
-                        "username": task.teamleader_assigned_to.username
-                    } if task.teamleader_assigned_to else None,
-                },
-                "created_by": {
-                    "id": task.created_by.id,
-                    "username": task.created_by.username,
-                    "usertype":task.created_by.usertype
-                }
-            }
-
-        return Response(
-            {
-                "created_tasks": [serialize_task(task) for task in created_tasks],
-                "assigned_tasks": [serialize_task(task) for task in assigned_tasks],
             },
-            status=status.HTTP_200_OK,
-        )
+            "project": {"id": task.project.id, "name": task.project.name},
+            **build_task_hours(task.id),
+        }, status=status.HTTP_200_OK)
 
 # Saving Data After Editing Task
 class EditTaskView(APIView):
@@ -169,32 +338,14 @@ class EditTaskView(APIView):
 
             created_by = request.user
             logger.debug(f"Request made by: {created_by.username} ({created_by.usertype})")
-            if created_by.usertype == "SuperAdmin" and new_assigned_to and new_assigned_to.usertype != "Admin":
-                logger.warning(f"SuperAdmin {created_by.username} tried to assign task to a non-Admin user.")
-                return Response(
-                    {"message": "SuperAdmin can only assign tasks to Admins"},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-            if created_by.usertype == "Admin" and new_assigned_to and new_assigned_to.usertype != "TeamLeader":
-                logger.warning(f"Admin {created_by.username} tried to assign task to a non-TeamLeader user.")
-                return Response(
-                    {"message": "Admin can only assign tasks to TeamLeaders"},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-            if created_by.usertype == "TeamLeader" and new_assigned_to and new_assigned_to.usertype != "User":
-                logger.warning(f"TeamLeader {created_by.username} tried to assign task to a non-User.")
-                return Response(
-                    {"message": "TeamLeader can only assign tasks to Users"},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
+            if new_assigned_to and created_by.usertype in Task.ASSIGNABLE_USERTYPES:
+                error = Task.assignment_error(created_by.usertype, new_assigned_to.usertype)
+                if error:
+                    logger.warning(f"{created_by.usertype} {created_by.username} tried to assign task to a {new_assigned_to.usertype}.")
+                    return Response({"message": error}, status=status.HTTP_400_BAD_REQUEST)
 
             if new_assigned_to:
-                if created_by.usertype == "SuperAdmin":
-                    task.superadmin_assigned_to = new_assigned_to
-                elif created_by.usertype == "Admin":
-                    task.admin_assigned_to = new_assigned_to
-                elif created_by.usertype == "TeamLeader":
-                    task.teamleader_assigned_to = new_assigned_to
+                task.assign_task(created_by, new_assigned_to, save=False)
             task.save()
             logger.debug(f"Task updated successfully, Assigned To: {new_assigned_to.username if new_assigned_to else None}")
             if old_assigned_to and old_assigned_to != new_assigned_to:
@@ -290,30 +441,20 @@ class AssignTaskView(APIView):
             assigned_to_id = request.data.get("assigned_to")
             assigned_to = CustomUser.objects.get(id=assigned_to_id)
 
-            old_assigned_to = task.admin_assigned_to or task.teamleader_assigned_to
-
-            if request.user.usertype == "Admin":
-                if assigned_to.usertype != "TeamLeader":
-                    return Response(
-                        {"message": "Admin can only assign tasks to TeamLeaders", "status": "failure"},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
-                task.admin_assigned_to = assigned_to  
-            elif request.user.usertype == "TeamLeader":
-                if assigned_to.usertype != "User":
-                    return Response(
-                        {"message": "TeamLeader can only assign tasks to Users", "status": "failure"},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
-                task.teamleader_assigned_to = assigned_to  
-
-            else:
+            # Same rules as create, edit and bulk assign: each usertype writes
+            # its own column, one level down
+            field = Task.ASSIGNMENT_FIELDS.get(request.user.usertype)
+            if field is None:
                 return Response(
                     {"message": "Invalid role for task assignment", "status": "failure"},
                     status=status.HTTP_403_FORBIDDEN,
                 )
+            error = Task.assignment_error(request.user.usertype, assigned_to.usertype)
+            if error:
+                return Response({"message": error, "status": "failure"}, status=status.HTTP_400_BAD_REQUEST)
 
-            task.save()
+            old_assigned_to = getattr(task, field)
+            task.assign_task(request.user, assigned_to)
 
             assigned_by_text = request.user.username if request.user else "N/A"
 
@@ -356,3 +497,201 @@ class AssignTaskView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+
+# Largest task list accepted by the bulk endpoints in one request
+BULK_TASK_LIMIT = 500
+
+# Columns loaded for assignees in the bulk endpoints
+ASSIGNEE_COLUMNS = ('id', 'username', 'usertype', 'chat_id')
+
+def _id_param(value):
+    return int(value) if str(value or '').isdigit() else None
+
+def _bulk_rows(data, key):
+    rows = data.get(key)
+    if not isinstance(rows, list) or not rows:
+        raise ValueError(f"{key} must be a non-empty list")
+    if len(rows) > BULK_TASK_LIMIT:
+        raise ValueError(f"At most {BULK_TASK_LIMIT} {key} per request")
+    if not all(isinstance(row, dict) for row in rows):
+        raise ValueError(f"Every entry of {key} must be an object")
+    return rows
+
+NEW_TASKS_HEADING = "📢 <b>New Tasks Assigned</b>"
+UNASSIGNED_TASKS_HEADING = "⚠️ <b>Tasks Unassigned</b>"
+
+def task_digest(sections, assigned_by):
+    lines = []
+    for heading, tasks in sections.items():
+        lines.append(f"{heading}\n")
+        for task in tasks:
+            lines.append(f"🔹 <b>{task.title}</b> ({task.project.name}), 📌 {task.priority}, 📅 {task.end_date}")
+        lines.append("")
+    lines.append(f"👤 <b>By:</b> {assigned_by.username}")
+    return "\n".join(lines)
+
+def queue_task_digests(digests, assigned_by, users):
+    """Queue one message per user from {user_id: {heading: [tasks]}}."""
+    for user_id, sections in digests.items():
+        user = users.get(user_id)
+        if user and user.chat_id:
+            queue_telegram_message(user.chat_id, task_digest(sections, assigned_by))
+
+def clean_task_row(row, projects, assignees, created_by):
+    """Build an unsaved Task from one bulk row, or return the reason it is invalid."""
+    title = (row.get('title') or '').strip()
+    if not title:
+        return None, "Title is required"
+    project = projects.get(_id_param(row.get('project')))
+    if project is None:
+        return None, "Project not found"
+
+    task_status = row.get('status') or 'To Do'
+    if task_status not in dict(Task.STATUS_CHOICES):
+        return None, f"Unknown status: {task_status}"
+    priority = row.get('priority') or 'Medium'
+    if priority not in Task.PRIORITY_LEVELS:
+        return None, f"Unknown priority: {priority}"
+    try:
+        start_date = parse_date(row.get('start_date') or '')
+        end_date = parse_date(row.get('end_date') or '')
+    except ValueError:
+        start_date = end_date = None
+    if start_date is None or end_date is None:
+        return None, "start_date and end_date must be YYYY-MM-DD dates"
+
+    task = Task(
+        title=title,
+        description=row.get('description') or '',
+        project=project,
+        status=task_status,
+        priority=priority,
+        start_date=start_date,
+        end_date=end_date,
+        created_by=created_by,
+    )
+    if row.get('assigned_to'):
+        assignee = assignees.get(_id_param(row.get('assigned_to')))
+        if assignee is None:
+            return None, "Assigned user not found"
+        error = Task.assignment_error(created_by.usertype, assignee.usertype)
+        if error:
+            return None, error
+        task.assign_task(created_by, assignee, save=False)
+    return task, None
+
+# Bulk Create Tasks: projects and assignees are validated with one query each,
+# valid rows are inserted together and each assignee gets a single digest.
+# Invalid rows are reported by position and do not block the others.
+class BulkCreateTasksView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        created_by = request.user
+        try:
+            rows = _bulk_rows(request.data, 'tasks')
+        except ValueError as e:
+            return Response({"message": str(e), "status": "failure"}, status=status.HTTP_400_BAD_REQUEST)
+
+        projects = Project.objects.only('id', 'name').in_bulk(
+            {_id_param(row.get('project')) for row in rows} - {None}
+        )
+        assignees = CustomUser.objects.only(*ASSIGNEE_COLUMNS).in_bulk(
+            {_id_param(row.get('assigned_to')) for row in rows} - {None}
+        )
+
+        tasks, errors = [], []
+        for index, row in enumerate(rows, start=1):
+            task, error = clean_task_row(row, projects, assignees, created_by)
+            if error:
+                errors.append({"row": index, "error": error})
+            else:
+                tasks.append(task)
+
+        with transaction.atomic():
+            if connection.features.can_return_rows_from_bulk_insert:
+                Task.objects.bulk_create(tasks, batch_size=500)
+            else:
+                # Backends without RETURNING (MySQL) leave bulk-created pks
+                # unset, and tasks have no natural key to read them back by
+                for task in tasks:
+                    task.save()
+
+        digests = defaultdict(lambda: defaultdict(list))
+        for task in tasks:
+            for field in TASK_ASSIGNEE_FIELDS:
+                assignee_id = getattr(task, f"{field}_id")
+                if assignee_id:
+                    digests[assignee_id][NEW_TASKS_HEADING].append(task)
+        queue_task_digests(digests, created_by, assignees)
+
+        return Response({
+            "message": f"{len(tasks)} task(s) created",
+            "status": "success" if tasks else "failure",
+            "created": [{"id": task.id, "title": task.title} for task in tasks],
+            "errors": errors,
+        }, status=status.HTTP_201_CREATED if tasks else status.HTTP_400_BAD_REQUEST)
+
+# Bulk Assign Tasks: Task.assign_task for many tasks, each in the caller's own
+# assignment column. Tasks and users are loaded with one query each, changed
+# tasks are written with one bulk_update, and every user gained or lost gets a
+# single digest.
+class BulkAssignTasksView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        assigned_by = request.user
+        field = Task.ASSIGNMENT_FIELDS.get(assigned_by.usertype)
+        if field is None:
+            return Response({"message": "Invalid role for task assignment", "status": "failure"}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            rows = _bulk_rows(request.data, 'assignments')
+        except ValueError as e:
+            return Response({"message": str(e), "status": "failure"}, status=status.HTTP_400_BAD_REQUEST)
+
+        tasks = Task.objects.select_related('project').only(
+            'id', 'title', 'priority', 'end_date', 'project__name', field
+        ).in_bulk({_id_param(row.get('task_id')) for row in rows} - {None})
+        user_ids = {_id_param(row.get('assigned_to')) for row in rows}
+        user_ids |= {getattr(task, f"{field}_id") for task in tasks.values()}
+        users = CustomUser.objects.only(*ASSIGNEE_COLUMNS).in_bulk(user_ids - {None})
+
+        changed, errors, seen = [], [], set()
+        digests = defaultdict(lambda: defaultdict(list))
+        for index, row in enumerate(rows, start=1):
+            task = tasks.get(_id_param(row.get('task_id')))
+            assignee = users.get(_id_param(row.get('assigned_to')))
+            if task is None:
+                error = "Task not found"
+            elif task.id in seen:
+                error = "Task is duplicated in the request"
+            elif assignee is None:
+                error = "Assigned user not found"
+            else:
+                error = Task.assignment_error(assigned_by.usertype, assignee.usertype)
+            if error:
+                errors.append({"row": index, "error": error})
+                continue
+
+            seen.add(task.id)
+            old_assignee_id = getattr(task, f"{field}_id")
+            if old_assignee_id == assignee.id:
+                continue
+            task.assign_task(assigned_by, assignee, save=False)
+            changed.append(task)
+            digests[assignee.id][NEW_TASKS_HEADING].append(task)
+            if old_assignee_id:
+                digests[old_assignee_id][UNASSIGNED_TASKS_HEADING].append(task)
+
+        with transaction.atomic():
+            Task.objects.bulk_update(changed, [field], batch_size=500)
+        queue_task_digests(digests, assigned_by, users)
+
+        # Rows that were valid but already assigned as requested still count
+        succeeded = bool(seen)
+        return Response({
+            "message": f"{len(changed)} task(s) reassigned",
+            "status": "success" if succeeded else "failure",
+            "updated": [task.id for task in changed],
+            "errors": errors,
+        }, status=status.HTTP_200_OK if succeeded else status.HTTP_400_BAD_REQUEST)
@@ -1,13 +1,112 @@
 from rest_framework.views import APIView
 from rest_framework import permissions, status
-from timesheet_app.models import CustomUser, Team, Project
+from timesheet_app.models import CustomUser, Team, TeamRole, Project
 from rest_framework.response import Response
-from timesheet_app.utils import send_telegram_message
-from django.db.models import Q
+from timesheet_app.utils import send_telegram_message, queue_telegram_message, parse_fieldset, render_fields
+from timesheet_app.views.project_views import TEAM_LEADER_FIELDS, prefetch_team_leaders, serialize_user_ref, add_user_ref
+from timesheet_app.negotiation import PayloadFormatNegotiation, wants_normalized
+from timesheet_app.deletions import schedule_deletion
+from timesheet_app.membership_graph import get_membership_graph
+from timesheet_app.reference_data import reference_data_response
+from timesheet_app.views.user_views import submitted_to_scope
+from django.db.models import Q, F, Func, IntegerField, OuterRef, Prefetch, Subquery
 from collections import defaultdict
-from django.shortcuts import get_object_or_404
-
-
+from django.db import transaction
+
+
+# Plain team columns and expandable relations (see parse_fieldset)
+TEAM_FIELDS = ('id', 'name', 'description', 'created_by', 'total_members')
+TEAM_EXPANSIONS = ('account_managers', 'team_leader_search', 'team_leader_development', 'team_leader_creative', 'subteams', 'projects')
+
+# Every user embedded in a team payload is loaded with just these columns
+TEAM_USER_COLUMNS = ('id', 'username', 'subteam')
+
+# Distinct members, account managers and leaders of the outer team, as one
+# correlated COUNT subquery rather than a set union over prefetched rows
+def team_member_count():
+    team = OuterRef(OuterRef('pk'))
+    users = CustomUser.objects.filter(
+        Q(id__in=Team.members.through.objects.filter(team_id=team).values('customuser_id')) |
+        Q(id__in=Team.account_managers.through.objects.filter(team_id=team).values('customuser_id')) |
+        Q(id__in=TeamRole.objects.filter(team_id=team).values('user_id'))
+    )
+    count = users.order_by().annotate(total=Func(F('id'), function='COUNT')).values('total')
+    return Subquery(count[:1], output_field=IntegerField())
+
+# Fixed prefetch plan: one query for the teams and the creator if requested,
+# plus one for the leaders and one per requested many-to-many relation
+def with_team_relations(teams, selected):
+    columns = ['id'] + [field for field in ('name', 'description') if field in selected]
+    if 'created_by' in selected:
+        teams = teams.select_related('created_by')
+        columns += [f"created_by__{column}" for column in TEAM_USER_COLUMNS]
+    teams = teams.only(*columns)
+    if 'total_members' in selected:
+        teams = teams.annotate(total_members=team_member_count())
+
+    if selected.intersection(TEAM_LEADER_FIELDS):
+        teams = teams.prefetch_related(prefetch_team_leaders(TEAM_USER_COLUMNS))
+    if 'account_managers' in selected:
+        teams = teams.prefetch_related(Prefetch('account_managers', queryset=CustomUser.objects.only(*TEAM_USER_COLUMNS)))
+    if 'subteams' in selected:
+        teams = teams.prefetch_related(Prefetch('members', queryset=CustomUser.objects.only(*TEAM_USER_COLUMNS)))
+    if 'projects' in selected:
+        teams = teams.prefetch_related(Prefetch('projects', queryset=Project.objects.only('id', 'name')))
+    return teams
+
+def serialize_subteams(team, member_ref=serialize_user_ref):
+    subteam_dict = defaultdict(list)
+    for member in team.members.all():
+        subteam_dict[member.subteam or "Uncategorized"].append(member_ref(member))
+    return [
+        {"subteam": subteam, "members": members}
+        for subteam, members in subteam_dict.items()
+    ]
+
+def serialize_team_user(user):
+    return {"id": user.id, "username": user.username, "subteam": user.subteam}
+
+TEAM_PAYLOAD = {
+    "id": lambda team: team.id,
+    "name": lambda team: team.name,
+    "description": lambda team: team.description,
+    "account_managers": lambda team: [serialize_user_ref(manager) for manager in team.account_managers.all()],
+    "team_leader_search": lambda team: serialize_user_ref(team.team_leader_search),
+    "team_leader_development": lambda team: serialize_user_ref(team.team_leader_development),
+    "team_leader_creative": lambda team: serialize_user_ref(team.team_leader_creative),
+    "subteams": serialize_subteams,
+    "created_by": lambda team: serialize_user_ref(team.created_by),
+    "projects": lambda team: [{"id": project.id, "name": project.name} for project in team.projects.all()],
+    "total_members": lambda team: team.total_members,
+}
+
+def serialize_teams(teams, selected):
+    return [render_fields(team, TEAM_PAYLOAD, selected) for team in teams]
+
+# ?format=normalized: teams, users and projects each serialized once, keyed by id
+def normalize_teams(teams, selected):
+    tables = {"teams": {}, "users": {}, "projects": {}}
+
+    def user_ref(user):
+        return add_user_ref(tables["users"], user, serialize_team_user)
+
+    def project_ref(project):
+        tables["projects"].setdefault(project.id, {"id": project.id, "name": project.name})
+        return project.id
+
+    getters = {
+        **TEAM_PAYLOAD,
+        "account_managers": lambda team: [user_ref(manager) for manager in team.account_managers.all()],
+        "team_leader_search": lambda team: user_ref(team.team_leader_search),
+        "team_leader_development": lambda team: user_ref(team.team_leader_development),
+        "team_leader_creative": lambda team: user_ref(team.team_leader_creative),
+        "subteams": lambda team: serialize_subteams(team, user_ref),
+        "created_by": lambda team: user_ref(team.created_by),
+        "projects": lambda team: [project_ref(project) for project in team.projects.all()],
+    }
+    for team in teams:
+        tables["teams"][team.id] = render_fields(team, getters, selected)
+    return tables
 
 # Create Team
 class CreateTeamView(APIView):
@@ -43,13 +142,15 @@ class CreateTeamView(APIView):
             team_instance = Team.objects.create(
                 name=name,
                 description=description,
-                team_leader_search=team_leader_search,
-                team_leader_development=team_leader_development,
-                team_leader_creative=team_leader_creative,
                 team=team,
                 subteam=subteam,
                 created_by=created_by,
             )
+            leaders = zip(TeamRole.DISCIPLINES, (team_leader_search, team_leader_development, team_leader_creative))
+            TeamRole.objects.bulk_create([
+                TeamRole(team=team_instance, user=leader, role=TeamRole.TEAM_LEADER, discipline=discipline)
+                for discipline, leader in leaders if leader
+            ])
             team_instance.account_managers.set(account_managers)
             team_instance.members.set(member_ids)
             team_instance.projects.set([project]) 
@@ -81,87 +182,33 @@ class CreateTeamView(APIView):
 # Fetch Teams
 class FetchTeamsView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    content_negotiation_class = PayloadFormatNegotiation
 
     def get(self, request, *args, **kwargs):
         user = request.user
-        
-        
+        try:
+            selected = parse_fieldset(request.query_params, TEAM_FIELDS, TEAM_EXPANSIONS)
+        except ValueError as e:
+            return Response({"message": str(e), "status": "failure"}, status=status.HTTP_400_BAD_REQUEST)
+
         if user.usertype == "SuperAdmin":
             teams = Team.objects.all()
         elif user.usertype in ["Admin", "TeamLeader","User"]:
-            teams = Team.objects.filter(
-                Q(account_managers=user) |
-                Q(team_leader_search=user) |
-                Q(team_leader_development=user) |
-                Q(team_leader_creative=user) |
-                Q(members=user)
-                
-            ).distinct()
+            # Team ids come from the membership graph instead of a five-way
+            # join with DISTINCT
+            teams = Team.objects.filter(id__in=get_membership_graph().team_ids(user.id))
         else:
             return Response({"message": "Permission denied", "status": "failure"}, status=status.HTTP_403_FORBIDDEN)
 
-        if not teams.exists():
+        # Evaluating the main query doubles as the 404 check; prefetches are
+        # skipped when it comes back empty
+        teams = list(with_team_relations(teams, selected))
+        if not teams:
             return Response({"message": "No teams found", "status": "failure"}, status=status.HTTP_404_NOT_FOUND)
 
-        team_data = []
-        for team in teams:
-            subteam_dict = defaultdict(list)
-            all_members = set()
-
-            for member in team.members.all():
-                subteam_dict[member.subteam or "Uncategorized"].append({
-                    "id": member.id,
-                    "username": member.username
-                })
-                all_members.add(member.id)
-
-            account_managers = [
-                {"id": manager.id, "username": manager.username}
-                for manager in team.account_managers.all()
-            ]
-
-            all_members.update(manager["id"] for manager in account_managers)
-
-            # Handling team leaders
-            def get_team_leader(leader):
-                return {"id": leader.id, "username": leader.username} if leader else None
-
-            team_leader_search = get_team_leader(team.team_leader_search)
-            team_leader_development = get_team_leader(team.team_leader_development)
-            team_leader_creative = get_team_leader(team.team_leader_creative)
-
-            for leader in [team_leader_search, team_leader_development, team_leader_creative]:
-                if leader:
-                    all_members.add(leader["id"])
-
-            total_members_count = len(all_members)
-            
-            projects = [
-                {"id": project.id, "name": project.name}
-                for project in team.projects.all()
-            ]
-
-
-            team_data.append({
-                "id": team.id,
-                "name": team.name,
-                "description": team.description,
-                "account_managers": account_managers,
-                "team_leader_search": team_leader_search,
-                "team_leader_development": team_leader_development,
-                "team_leader_creative": team_leader_creative,
-                "subteams": [
-                    {"subteam": subteam, "members": members}
-                    for subteam, members in subteam_dict.items()
-                ],
-                "created_by": {
-                    "id": team.created_by.id,
-                    "username": team.created_by.username
-                } if team.created_by else None,
-                "projects": projects,
-                "total_members": total_members_count
-            })
-
+        if wants_normalized(request):
+            return Response(normalize_teams(teams, selected), status=status.HTTP_200_OK)
+        team_data = serialize_teams(teams, selected)
         return Response({"teams": team_data}, status=status.HTTP_200_OK)
 
 class GetAssignedTeamView(APIView):
@@ -174,36 +221,22 @@ class GetAssignedTeamView(APIView):
             return Response({"message": "User is not a Team Leader", "status": "failure"}, status=status.HTTP_403_FORBIDDEN)
 
         try:
-           
-            team = Team.objects.filter(
-                Q(team_leader_search=user) |
-                Q(team_leader_development=user) |
-                Q(team_leader_creative=user)
-            ).first()
-
-            if not team:
+            graph = get_membership_graph()
+            led_teams = graph.led_teams(user.id)
+            if not led_teams:
                 return Response({"message": "No assigned team found", "status": "failure"}, status=status.HTTP_404_NOT_FOUND)
 
-            # Determine which subteam the leader manages
-            if team.team_leader_search == user:
-                team_type = "Search"
-            elif team.team_leader_development == user:
-                team_type = "Development"
-            elif team.team_leader_creative == user:
-                team_type = "Creative"
-            else:
-                team_type = None
-
-            if not team_type:
-                return Response({"message": "User is not assigned to a specific subteam", "status": "failure"}, status=status.HTTP_400_BAD_REQUEST)
-
-            
-            assigned_team_members = team.members.filter(subteam=team_type).values("id", "username")
+            # The first team led, and the subteam role held in it
+            team_id, team_type = led_teams[0]
+            assigned_team_members = [
+                {"id": member_id, "username": graph.users[member_id].username}
+                for member_id in graph.teams[team_id].members_by_subteam.get(team_type, ())
+            ]
 
             return Response({
                 "team": {
                     "team_type": team_type,
-                    "members": list(assigned_team_members)  
+                    "members": assigned_team_members
                 },
                 "status": "success"
             }, status=status.HTTP_200_OK)
@@ -211,83 +244,101 @@ class GetAssignedTeamView(APIView):
         except Exception as e:
             return Response({"message": str(e), "status": "failure"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-# Edit Team 
+# Edit Team: memberships are diffed as id sets and applied as bulk through-table
+# writes, so the query count does not grow with the size of the team
 class EditTeamView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def put(self, request, team_id, *args, **kwargs):
         data = request.data
         try:
-            team = get_object_or_404(Team, id=team_id)
-
-            old_account_managers = set(team.account_managers.all())
-            old_team_leaders = {
-                "search": team.team_leader_search,
-                "development": team.team_leader_development,
-                "creative": team.team_leader_creative,
+            team = Team.objects.only('id', 'name', 'description', 'team', 'subteam').get(id=team_id)
+
+            requested_managers = {int(id) for id in data.get("account_manager_ids", []) if id}
+            requested_members = {int(id) for id in data.get("member_ids", []) if id}
+            requested_leaders = {}
+            for discipline in TeamRole.DISCIPLINES:
+                user_id = data.get(f"team_leader_{discipline.lower()}")
+                requested_leaders[discipline] = int(user_id) if user_id and str(user_id).isdigit() else None
+
+            # Unknown ids are dropped, as before; one query validates them all
+            existing = set(CustomUser.objects.filter(
+                id__in=requested_managers | requested_members | set(requested_leaders.values())
+            ).values_list('id', flat=True))
+            new_managers = requested_managers & existing
+            new_members = requested_members & existing
+            new_leaders = {discipline: user_id if user_id in existing else None for discipline, user_id in requested_leaders.items()}
+
+            Managers = Team.account_managers.through
+            Members = Team.members.through
+            old_managers = set(Managers.objects.filter(team_id=team.id).values_list('customuser_id', flat=True))
+            old_members = set(Members.objects.filter(team_id=team.id).values_list('customuser_id', flat=True))
+            Leaders = TeamRole.objects.filter(team_id=team.id, role=TeamRole.TEAM_LEADER)
+            old_leaders = {discipline: None for discipline in TeamRole.DISCIPLINES}
+            old_leaders.update(Leaders.values_list('discipline', 'user_id'))
+
+            added_managers, removed_managers = new_managers - old_managers, old_managers - new_managers
+            added_members, removed_members = new_members - old_members, old_members - new_members
+            added_leaders = {
+                discipline: user_id for discipline, user_id in new_leaders.items()
+                if user_id and user_id != old_leaders[discipline]
+            }
+            removed_leaders = {
+                discipline: user_id for discipline, user_id in old_leaders.items()
+                if user_id and user_id != new_leaders[discipline]
             }
-            old_members = set(team.members.all())
 
             team.name = data.get("name", team.name)
             team.description = data.get("description", team.description)
-
-            account_manager_ids = [int(id) for id in data.get("account_manager_ids", []) if id]
-            new_account_managers = set(CustomUser.objects.filter(id__in=account_manager_ids))
-            team.account_managers.set(new_account_managers)
-
-            def get_user_by_id(user_id):
-               user_id = user_id if user_id and str(user_id).isdigit() else None
-               return CustomUser.objects.filter(id=user_id).first() if user_id else None
-
-
-            new_team_leaders = {
-                "search": get_user_by_id(data.get("team_leader_search")),
-                "development": get_user_by_id(data.get("team_leader_development")),
-                "creative": get_user_by_id(data.get("team_leader_creative")),
-            }
-            team.team_leader_search = new_team_leaders["search"]
-            team.team_leader_development = new_team_leaders["development"]
-            team.team_leader_creative = new_team_leaders["creative"]
-
             team.team = data.get("team", team.team)
             team.subteam = data.get("subteam", team.subteam)
 
-            member_ids = [int(id) for id in data.get("member_ids", []) if id]
-            new_members = set(CustomUser.objects.filter(id__in=member_ids))
-            team.members.set(new_members)
-
-            team.save()
-
-            added_members = new_members - old_members
-            removed_members = old_members - new_members
-            added_account_managers = new_account_managers - old_account_managers
-            removed_account_managers = old_account_managers - new_account_managers
-
-            added_team_leaders = {
-                role: new_team_leaders[role]
-                for role in old_team_leaders
-                if new_team_leaders[role] and new_team_leaders[role] != old_team_leaders[role]
-            }
-            removed_team_leaders = {
-                role: old_team_leaders[role]
-                for role in old_team_leaders
-                if old_team_leaders[role] and old_team_leaders[role] != new_team_leaders[role]
-            }
-
-            if team.projects.exists():
-                for project in team.projects.all():
-                    for user in added_members:
-                        send_telegram_message(user.chat_id, f"You have been added to the project: <b>{project.name}</b> as part of team <b>{team.name}</b>.")
-                    for user in removed_members:
-                        send_telegram_message(user.chat_id, f"You have been removed from the project: <b>{project.name}</b> from team <b>{team.name}</b>.")
-                    for user in added_account_managers:
-                        send_telegram_message(user.chat_id, f"You have been assigned as an Account Manager for project: <b>{project.name}</b> in team <b>{team.name}</b>.")
-                    for user in removed_account_managers:
-                        send_telegram_message(user.chat_id, f"You have been removed as an Account Manager from project: <b>{project.name}</b> in team <b>{team.name}</b>.")
-                    for role, user in added_team_leaders.items():
-                        send_telegram_message(user.chat_id, f"You have been assigned as <b>{role.capitalize()} Team Leader</b> for project: <b>{project.name}</b> in team <b>{team.name}</b>.")
-                    for role, user in removed_team_leaders.items():
-                        send_telegram_message(user.chat_id, f"You have been removed as <b>{role.capitalize()} Team Leader</b> from project: <b>{project.name}</b> in team <b>{team.name}</b>.")
+            with transaction.atomic():
+                for through, removed, added in ((Managers, removed_managers, added_managers), (Members, removed_members, added_members)):
+                    if removed:
+                        through.objects.filter(team_id=team.id, customuser_id__in=removed).delete()
+                    if added:
+                        through.objects.bulk_create([through(team_id=team.id, customuser_id=user_id) for user_id in added])
+                vacated = [discipline for discipline in removed_leaders if discipline not in added_leaders]
+                if vacated:
+                    Leaders.filter(discipline__in=vacated).delete()
+                for discipline, user_id in added_leaders.items():
+                    if old_leaders[discipline]:
+                        Leaders.filter(discipline=discipline).update(user_id=user_id)
+                TeamRole.objects.bulk_create([
+                    TeamRole(team_id=team.id, user_id=user_id, role=TeamRole.TEAM_LEADER, discipline=discipline)
+                    for discipline, user_id in added_leaders.items() if not old_leaders[discipline]
+                ])
+                # Saved last: the post_save receiver rebuilds project memberships
+                # from the through and role rows written above
+                team.save()
+
+            changed_ids = (
+                added_managers | removed_managers | added_members | removed_members
+                | set(added_leaders.values()) | set(removed_leaders.values())
+            )
+            project_names = list(team.projects.values_list('name', flat=True)) if changed_ids else []
+
+            if project_names:
+                messages = defaultdict(list)
+                for project in project_names:
+                    for user_id in added_members:
+                        messages[user_id].append(f"You have been added to the project: <b>{project}</b> as part of team <b>{team.name}</b>.")
+                    for user_id in removed_members:
+                        messages[user_id].append(f"You have been removed from the project: <b>{project}</b> from team <b>{team.name}</b>.")
+                    for user_id in added_managers:
+                        messages[user_id].append(f"You have been assigned as an Account Manager for project: <b>{project}</b> in team <b>{team.name}</b>.")
+                    for user_id in removed_managers:
+                        messages[user_id].append(f"You have been removed as an Account Manager from project: <b>{project}</b> in team <b>{team.name}</b>.")
+                    for discipline, user_id in added_leaders.items():
+                        messages[user_id].append(f"You have been assigned as <b>{discipline} Team Leader</b> for project: <b>{project}</b> in team <b>{team.name}</b>.")
+                    for discipline, user_id in removed_leaders.items():
+                        messages[user_id].append(f"You have been removed as <b>{discipline} Team Leader</b> from project: <b>{project}</b> in team <b>{team.name}</b>.")
+
+                # Only the users whose membership changed are loaded, for their chat ids
+                chat_ids = dict(CustomUser.objects.filter(id__in=messages).values_list('id', 'chat_id'))
+                for user_id, lines in messages.items():
+                    queue_telegram_message(chat_ids.get(user_id), "\n".join(lines))
 
             return Response({"message": "Team updated successfully", "status": "success", "team_id": team.id}, status=status.HTTP_200_OK)
 
@@ -307,32 +358,27 @@ class DeleteTeamView(APIView):
     def delete(self, request, team_id, *args, **kwargs):
         try:
     
-            team = Team.objects.get(id=team_id)
-            projects_assigned = team.projects.all() 
-            users_to_notify = list(team.members.all()) + list(team.account_managers.all())
-
-            if team.team_leader_search:
-                users_to_notify.append(team.team_leader_search)
-            if team.team_leader_development:
-                users_to_notify.append(team.team_leader_development)
-            if team.team_leader_creative:
-                users_to_notify.append(team.team_leader_creative)
-
-            # Notify users if the team is associated with any projects
-            if projects_assigned.exists():
-                for project in projects_assigned:
-                    for user in users_to_notify:
-                        try:
-                            message = f"The team <b>{team.name}</b> has been deleted. You have been removed from the project: <b>{project.name}</b>"
-                            send_telegram_message(user.chat_id, message)
-                        except Exception as notify_error:
-                            print(f"Failed to send notification to {user.username}: {notify_error}")
-                            
-            team.projects.clear()
-            # Delete the team
-            team.delete()
-
-            return Response({"message": "Team deleted successfully", "status": "success"}, status=status.HTTP_200_OK)
+            team = Team.objects.prefetch_related(prefetch_team_leaders(('id', 'chat_id'))).get(id=team_id)
+            project_names = list(team.projects.values_list('name', flat=True))
+
+            # Members, account managers and leaders, read before the job clears them
+            users_to_notify = {user.id: user for user in team.members.only('id', 'chat_id')}
+            users_to_notify.update((user.id, user) for user in team.account_managers.only('id', 'chat_id'))
+            for discipline in TeamRole.DISCIPLINES:
+                leader = team.leader(discipline)
+                if leader:
+                    users_to_notify[leader.id] = leader
+
+            job = schedule_deletion(team, requested_by=request.user)
+
+            # One message per user, listing every project the team was on
+            if project_names:
+                projects = ", ".join(f"<b>{name}</b>" for name in project_names)
+                message = f"The team <b>{team.name}</b> has been deleted. You have been removed from the project(s): {projects}"
+                for user in users_to_notify.values():
+                    queue_telegram_message(user.chat_id, message)
+
+            return Response({"message": "Team deleted successfully", "status": "success", "job_id": job.id}, status=status.HTTP_202_ACCEPTED)
 
         except Team.DoesNotExist:
             return Response({"message": "Team not found", "status": "failure"}, status=status.HTTP_404_NOT_FOUND)
@@ -350,15 +396,14 @@ class FetchSubmittedToUsersView(APIView):
 
     def get(self, request, *args, **kwargs):
         user = request.user
-        if user.usertype == 'User':
-            users = CustomUser.objects.filter(usertype='TeamLeader', team=user.team)
-        elif user.usertype == 'TeamLeader':
-            users = CustomUser.objects.filter(usertype='Admin')
-        elif user.usertype == 'Admin':
-            users = CustomUser.objects.filter(usertype='SuperAdmin')
-        else:
-            users = CustomUser.objects.none()
 
-        user_data = [{"id": user.id, "username": user.username} for user in users]
-        return Response({"users": user_data}, status=status.HTTP_200_OK)
+        def build():
+            usertypes, scope = submitted_to_scope(user)
+            users = get_membership_graph().find_users(usertypes, **scope)
+            user_data = [{"id": user.id, "username": user.username} for user in users]
+            return {"users": user_data}
+
+        # Only a User's choices depend on their team
+        team = user.team if user.usertype == 'User' else None
+        return reference_data_response(request, 'submitted_to', f"{user.usertype}_{team}", build)
 
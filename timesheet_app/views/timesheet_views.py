@@ -5,6 +5,8 @@ from timesheet_app.serializers import TimesheetSerializer, TimesheetTableSeriali
 from rest_framework.response import Response
 from django.db.models import Min
 from timesheet_app.utils import send_telegram_message
+from timesheet_app.deletions import schedule_deletion
+from timesheet_app.task_links import LINKED_TASK_PROJECT_ERROR, invalid_task_links, link_timesheets
 
 
 # Fetch Timesheets
@@ -13,7 +15,7 @@ class FetchTimesheetsView(APIView):
 
     def get(self, request, *args, **kwargs):
         user = request.user
-        timesheets = Timesheet.objects.filter(created_by=user)
+        timesheets = Timesheet.objects.visible().filter(created_by=user)
         serializer = TimesheetSerializer(timesheets, many=True)
         return Response({"timesheets": serializer.data}, status=status.HTTP_200_OK)
 
@@ -26,7 +28,10 @@ class EditTimesheetView(APIView):
         try:
             timesheet = Timesheet.objects.get(id=timesheet_id, created_by=request.user)
             timesheet.date = data.get('date', timesheet.date)
-            timesheet.task = data.get('task', timesheet.task)
+            if 'task' in data and data['task'] != timesheet.task:
+                timesheet.task = data['task']
+                timesheet.linked_task_id = None
+                link_timesheets([timesheet])
             timesheet.submitted_to = data.get('submitted_to', timesheet.submitted_to)
             timesheet.status = data.get('status', timesheet.status)
             timesheet.description = data.get('description', timesheet.description)
@@ -123,22 +128,35 @@ class EditTimesheetTableView(APIView):
         data = request.data
         try:
             timesheet_table = TimesheetTable.objects.get(id=timesheet_table_id, created_by=request.user)
-            timesheet_table.timesheets.clear()
+            timesheets = []
             for timesheet_data in data.get('timesheets', []):
                 submitted_to_username = timesheet_data.pop('submitted_to')
                 submitted_to = CustomUser.objects.get(username=submitted_to_username)
                 created_by_username = timesheet_data.pop('created_by')
                 created_by = CustomUser.objects.get(username=created_by_username)
+                if 'linked_task' in timesheet_data:
+                    timesheet_data['linked_task_id'] = timesheet_data.pop('linked_task')
                 timesheet_id = timesheet_data.get('id')
                 if timesheet_id:
                     timesheet = Timesheet.objects.get(id=timesheet_id)
+                    loaded = (timesheet.task, timesheet.project_id, timesheet.linked_task_id)
                     for key, value in timesheet_data.items():
                         setattr(timesheet, key, value)
+                    changed = (timesheet.task, timesheet.project_id) != loaded[:2]
+                    if changed and timesheet.linked_task_id == loaded[2]:
+                        # Renamed or moved without a new link, so match it again
+                        timesheet.linked_task_id = None
                     timesheet.submitted_to = submitted_to
                     timesheet.created_by = created_by
-                    timesheet.save()
                 else:
-                    timesheet = Timesheet.objects.create(submitted_to=submitted_to, created_by=created_by, **timesheet_data)
+                    timesheet = Timesheet(submitted_to=submitted_to, created_by=created_by, **timesheet_data)
+                timesheets.append(timesheet)
+            # As TimesheetSerializer.validate, before the table is touched
+            if invalid_task_links(timesheets):
+                return Response({"message": LINKED_TASK_PROJECT_ERROR, "status": "failure"}, status=status.HTTP_400_BAD_REQUEST)
+            timesheet_table.timesheets.clear()
+            for timesheet in link_timesheets(timesheets):
+                timesheet.save()
                 timesheet_table.timesheets.add(timesheet)
             timesheet_table.save()
             serializer = TimesheetTableSerializer(timesheet_table)
@@ -165,8 +183,9 @@ class DeleteTimesheetTableView(APIView):
             timesheet_table = TimesheetTable.objects.get(id=timesheet_table_id)
             if timesheet_table.created_by != request.user:
                 return Response({"message": "Permission denied", "status": "failure"}, status=status.HTTP_403_FORBIDDEN)
-            timesheet_table.delete()  # This will also delete related timesheets
-            return Response({"message": "Timesheet table and related timesheets deleted successfully", "status": "success"}, status=status.HTTP_200_OK)
+            # Hidden now; the table and its timesheets are deleted by a background job
+            job = schedule_deletion(timesheet_table, requested_by=request.user)
+            return Response({"message": "Timesheet table and related timesheets deleted successfully", "status": "success", "job_id": job.id}, status=status.HTTP_202_ACCEPTED)
         except TimesheetTable.DoesNotExist:
             return Response({"message": "Timesheet table not found", "status": "failure"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
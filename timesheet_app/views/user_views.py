@@ -3,6 +3,8 @@ from rest_framework import permissions, status
 from timesheet_app.models import CustomUser,Timesheet
 from rest_framework.response import Response
 from django.db.models import Q,Sum
+from timesheet_app.membership_graph import ANY, get_membership_graph
+from timesheet_app.reference_data import reference_data_response
 
 # Fetch a specific user's details for profile
 class FetchUserDetailsView(APIView):
@@ -42,35 +44,139 @@ class UpdateProfileView(APIView):
         except Exception as e:
             return Response({"message": "Failed to update profile", "status": "failure"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+# The users each picker offers, as find_users() arguments: (usertypes, filters)
+def assignee_scope(user):
+    if user.usertype == 'SuperAdmin':
+        return ['Admin', 'TeamLeader', 'User'], {"exclude_usernames": ['Narayan']}
+    elif user.usertype == 'Admin':
+        return ['TeamLeader', 'User'], {}
+    elif user.usertype == 'TeamLeader':
+        return None, {"team": user.team, "exclude_ids": [user.id]}
+    return [], {}
+
+def submitted_to_scope(user):
+    if user.usertype == 'User':
+        return ['TeamLeader'], {"team": user.team}
+    elif user.usertype == 'TeamLeader':
+        return ['Admin'], {}
+    elif user.usertype == 'Admin':
+        return ['SuperAdmin'], {}
+    return [], {}
+
+def all_users_scope(user):
+    return None, {"exclude_usernames": ['Narayan']}
+
+USER_SCOPES = {'users': assignee_scope, 'submitted-to': submitted_to_scope, 'all': all_users_scope}
+
+def narrow_scope(usertypes, scope, query_params):
+    """Apply ?usertype= and ?subteam= within a picker's scope."""
+    usertype = query_params.get('usertype')
+    subteam = query_params.get('subteam')
+    if usertype:
+        requested = usertype.split(',')
+        usertypes = requested if usertypes is None else [choice for choice in usertypes if choice in requested]
+    if subteam:
+        scope = dict(scope, subteam=subteam)
+    return usertypes, scope
+
+def scope_q(usertypes=None, team=ANY, subteam=ANY, exclude_ids=(), exclude_usernames=()):
+    """find_users() arguments as a Q, for the queries the graph cannot answer."""
+    filters = Q()
+    if usertypes is not None:
+        filters &= Q(usertype__in=usertypes)
+    if team is not ANY:
+        filters &= Q(team=team)
+    if subteam is not ANY:
+        filters &= Q(subteam=subteam)
+    if exclude_ids:
+        filters &= ~Q(id__in=exclude_ids)
+    if exclude_usernames:
+        filters &= ~Q(username__in=exclude_usernames)
+    return filters
+
 # Fetch Users Based on the User Type 
 class FetchUsersView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
-        user = request.user
-        usertype = request.query_params.get('usertype')
-        subteam = request.query_params.get('subteam')
-        
-        if user.usertype == 'SuperAdmin':
-            users = CustomUser.objects.filter(
-                Q(usertype='Admin') | Q(usertype='TeamLeader') | Q(usertype='User')
-            ).exclude(username='Narayan')
-        elif user.usertype == 'Admin':
-            users = CustomUser.objects.filter(
-                Q(usertype='TeamLeader') | Q(usertype='User')
-            )
-        elif user.usertype == 'TeamLeader':
-            users = CustomUser.objects.filter(team=user.team).exclude(id=user.id)
-        else:
-            users = CustomUser.objects.none()
-
-        if usertype:
-            users = users.filter(usertype__in=usertype.split(','))
-        if subteam:
-            users = users.filter(subteam=subteam)
+        usertypes, scope = narrow_scope(*assignee_scope(request.user), request.query_params)
+        users = get_membership_graph().find_users(usertypes, **scope)
         
         user_data = [{"id": user.id, "username": user.username, "team": user.team} for user in users]
         return Response({"users": user_data}, status=status.HTTP_200_OK)
+
+USER_SEARCH_LIMIT = 10
+USER_SEARCH_MAX_LIMIT = 50
+
+def prefix_range(prefix):
+    """
+    Bounds [prefix, upper) holding exactly the strings that start with
+    `prefix`. Trailing U+10FFFF have no successor and are dropped before
+    incrementing; upper is None when nothing is left to increment.
+    """
+    stem = prefix.rstrip('\U0010ffff')
+    if not stem:
+        return prefix, None
+    successor = ord(stem[-1]) + 1
+    if 0xD800 <= successor <= 0xDFFF:
+        # Surrogates cannot be encoded for the database; none sort between
+        successor = 0xE000
+    return prefix, stem[:-1] + chr(successor)
+
+def search_users(prefix, limit, usertypes=None, **scope):
+    """
+    Up to `limit` users in scope with a SEARCH_FIELDS value starting with
+    `prefix`, ignoring case: username matches first, then first name, last
+    name and email. Each field is one range scan of its search key index,
+    read only while the list is short.
+    """
+    lower, upper = prefix_range(CustomUser.search_key(prefix))
+    users = CustomUser.objects.filter(scope_q(usertypes, **scope)).only(
+        'id', 'username', 'firstname', 'lastname', 'usertype', 'team'
+    )
+    found = {}
+    for field in CustomUser.SEARCH_FIELDS:
+        if len(found) >= limit:
+            break
+        key = f"{field}_key"
+        matches = users.filter(**{f"{key}__gte": lower})
+        if upper is not None:
+            matches = matches.filter(**{f"{key}__lt": upper})
+        matches = matches.exclude(id__in=list(found)).order_by(key, 'id')[:limit - len(found)]
+        for match in matches:
+            found[match.id] = match
+    return list(found.values())
+
+# Search Users: typeahead for the user pickers, e.g. ?q=ra&scope=submitted-to
+class SearchUsersView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        prefix = (request.query_params.get('q') or '').strip()
+        scope_name = request.query_params.get('scope', 'users')
+        limit = request.query_params.get('limit', str(USER_SEARCH_LIMIT))
+        if not prefix:
+            return Response({"message": "q is required", "status": "failure"}, status=status.HTTP_400_BAD_REQUEST)
+        if scope_name not in USER_SCOPES:
+            return Response({"message": f"Unknown scope: {scope_name}", "status": "failure"}, status=status.HTTP_400_BAD_REQUEST)
+        if not limit.isdigit() or not 1 <= int(limit) <= USER_SEARCH_MAX_LIMIT:
+            return Response({"message": f"limit must be between 1 and {USER_SEARCH_MAX_LIMIT}", "status": "failure"}, status=status.HTTP_400_BAD_REQUEST)
+
+        usertypes, scope = narrow_scope(*USER_SCOPES[scope_name](request.user), request.query_params)
+        users = search_users(prefix, int(limit), usertypes, **scope)
+
+        user_data = [
+            {
+                "id": user.id,
+                "username": user.username,
+                "first_name": user.firstname,
+                "last_name": user.lastname,
+                "usertype": user.usertype,
+                "team": user.team,
+            }
+            for user in users
+        ]
+        return Response({"users": user_data}, status=status.HTTP_200_OK)
     
 # Fetch Team Leaders for a Specific Team
 class FetchTeamLeadersView(APIView):
@@ -81,15 +187,18 @@ class FetchTeamLeadersView(APIView):
         if team not in ['Search', 'Creative', 'Development']:
             return Response({"message": "Invalid team"}, status=status.HTTP_400_BAD_REQUEST)
 
-        team_leaders = CustomUser.objects.filter(
-            usertype='TeamLeader',
-            team=team
-        )
-        team_leader_data = [
-            {"id": leader.id, "username": leader.username}
-            for leader in team_leaders
-        ]
-        return Response({"team_leaders": team_leader_data}, status=status.HTTP_200_OK)
+        def build():
+            team_leaders = CustomUser.objects.filter(
+                usertype='TeamLeader',
+                team=team
+            ).only('id', 'username').order_by('id')
+            team_leader_data = [
+                {"id": leader.id, "username": leader.username}
+                for leader in team_leaders
+            ]
+            return {"team_leaders": team_leader_data}
+
+        return reference_data_response(request, 'team_leaders', team, build)
 
 # Fetch Working Hours Data
 class FetchWorkingHoursView(APIView):
@@ -109,7 +218,7 @@ class FetchWorkingHoursView(APIView):
         else:
             users = CustomUser.objects.none()
 
-        working_hours = Timesheet.objects.values('created_by__id').annotate(hours=Sum('hours'))
+        working_hours = Timesheet.objects.visible().values('created_by__id').annotate(hours=Sum('hours'))
         working_hours_dict = {item['created_by__id']: item['hours'] for item in working_hours}
 
         working_hours_data = [
@@ -123,6 +232,26 @@ class FetchAllUsers(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
-        users = CustomUser.objects.exclude(username="Narayan") 
-        user_data = [{"id": user.id, "username": user.username, "team": user.team} for user in users]
-        return Response({"users": user_data}, status=status.HTTP_200_OK)
\ No newline at end of file
+        def build():
+            users = CustomUser.objects.exclude(username="Narayan").only('id', 'username', 'team').order_by('id')
+            user_data = [{"id": user.id, "username": user.username, "team": user.team} for user in users]
+            return {"users": user_data}
+
+        return reference_data_response(request, 'all_users', 'all', build)
+
+# Fetch the choice lists of the user forms and filters
+class FetchUserChoicesView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        def build():
+            return {
+                name: [{"value": value, "label": label} for value, label in choices]
+                for name, choices in (
+                    ("usertypes", CustomUser.USERTYPE_CHOICES),
+                    ("teams", CustomUser.TEAM_CHOICES),
+                    ("subteams", CustomUser.SUBTEAM_CHOICES),
+                )
+            }
+
+        return reference_data_response(request, 'user_choices', 'all', build)
\ No newline at end of file